@@ -4,418 +4,185 @@ CrewBuilder FastAPI Server - No API Keys Version
 API server that works without OpenAI API keys using fallback logic
 """
 
+import os
 import sys
+import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 from typing import Dict, Any
 import json
-import traceback
-from datetime import datetime
+import atexit
+import logging
+import logging.handlers
+import queue
 
 # Add the project root to Python path
 project_root = Path(__file__).parent
 sys.path.insert(0, str(project_root))
 
+# Logging: records are queued and written by a background listener thread,
+# so request handlers never block on stdout. It is set up by the startup hook
+# rather than at import, since pipeline worker processes re-import this file
+# when the server is launched as a script.
+_log_queue = queue.Queue(-1)
+_log_listener = logging.handlers.QueueListener(_log_queue, logging.StreamHandler())
+logger = logging.getLogger("crewbuilder")
+_logging_started = False
+
 # FastAPI imports
 from fastapi import FastAPI, HTTPException
-from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 from pydantic import BaseModel
 
-# CrewBuilder imports
-from agents.requirements_analyst import TechnicalSpecification
-from agents.system_architect import AgentSpecification, TaskSpecification, CrewWorkflow, CrewArchitecture
+# CrewBuilder imports: the fallback pipeline runs in worker processes, which
+# import only its module (names re-exported for existing callers)
+from fallback_pipeline import (
+    analyze_requirements, design_crew_architecture, crew_dependencies,
+    FallbackRequirementsAnalyst, FallbackSystemArchitect, run_fallback_pipeline,
+    extract_system_name, estimate_cost, get_complexity_score, _iso_now
+)
 
 # Create FastAPI app
 app = FastAPI(
     title="CrewBuilder API",
     description="AI Agent Meta-System - Building AI agents that build AI agent systems (Fallback Mode)",
-    version="1.0.0"
-)
-
-# Configure CORS
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["http://localhost:3000", "http://127.0.0.1:3000"],
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
+    version="1.0.0",
+    default_response_class=ORJSONResponse
 )
 
-# Request/Response Models
-class GenerationRequest(BaseModel):
-    requirement: str
-
-class GenerationResponse(BaseModel):
-    success: bool
-    data: Dict[str, Any] = None
-    error: str = None
-
-# No-API-Key Fallback Implementation
-class FallbackRequirementsAnalyst:
-    """Requirements analyst that works without API keys"""
+class FastCORS:
+    """Minimal pure-ASGI CORS middleware for a fixed set of allowed origins
     
-    def analyze_requirements(self, user_input: str) -> TechnicalSpecification:
-        """Analyze requirements using fallback logic only"""
-        
-        # Categorize based on keywords
-        user_lower = user_input.lower()
-        
-        if any(word in user_lower for word in ['content', 'blog', 'social', 'post', 'article']):
-            category = "content_creation"
-        elif any(word in user_lower for word in ['crm', 'sales', 'lead', 'customer']):
-            category = "system_integration"
-        elif any(word in user_lower for word in ['data', 'analytics', 'report', 'dashboard']):
-            category = "data_analysis"
-        elif any(word in user_lower for word in ['meta', 'crewbuilder', 'agent', 'ai system']):
-            category = "system_development"
-        else:
-            category = "process_automation"
-        
-        # Determine complexity
-        complexity_indicators = {
-            'simple': ['simple', 'basic', 'one', 'single', 'automate'],
-            'moderate': ['multiple', 'integrate', 'workflow', 'process', 'several'],
-            'complex': ['enterprise', 'advanced', 'complex', 'machine learning', 'ai', 'scale', 'distributed', 'meta']
-        }
-        
-        complexity_scores = {}
-        for level, keywords in complexity_indicators.items():
-            score = sum(1 for keyword in keywords if keyword in user_lower)
-            complexity_scores[level] = score
-        
-        if len(user_input) > 500 or complexity_scores['complex'] > 0:
-            complexity = "complex"
-            estimated_agents = 5
-        elif len(user_input) > 200 or complexity_scores['moderate'] > 1:
-            complexity = "moderate"
-            estimated_agents = 4
-        else:
-            complexity = "simple"
-            estimated_agents = 3
-        
-        # Generate agent roles based on category
-        agent_roles = self._get_fallback_agent_roles(category)
-        workflow_steps = self._get_fallback_workflow_steps(category)
-        apis_required = self._get_fallback_apis(user_input, category)
-        
-        return TechnicalSpecification(
-            agent_roles_needed=agent_roles[:estimated_agents],
-            workflow_steps=workflow_steps,
-            apis_required=apis_required,
-            data_flows=[
-                {"from": "input", "to": "processing", "type": "sequential"},
-                {"from": "processing", "to": "validation", "type": "sequential"},
-                {"from": "validation", "to": "output", "type": "sequential"}
-            ],
-            complexity_estimate=complexity,
-            estimated_agents=estimated_agents
-        )
+    Reads the Origin header straight from the ASGI scope, answers preflight
+    requests without touching the app, and only decorates response headers
+    for allowed origins. Credentials, all methods and all headers are allowed.
+    """
     
-    def _get_fallback_agent_roles(self, category: str):
-        """Get fallback agent roles based on category"""
-        role_templates = {
-            "content_creation": [
-                {"role": "content_researcher", "responsibility": "Research topics and trends"},
-                {"role": "content_generator", "responsibility": "Generate high-quality content"},
-                {"role": "seo_optimizer", "responsibility": "Optimize content for search engines"},
-                {"role": "publishing_manager", "responsibility": "Schedule and publish content"},
-                {"role": "performance_tracker", "responsibility": "Track content performance"}
-            ],
-            "system_integration": [
-                {"role": "integration_analyst", "responsibility": "Analyze system requirements"},
-                {"role": "data_connector", "responsibility": "Connect and sync data sources"},
-                {"role": "workflow_orchestrator", "responsibility": "Orchestrate business workflows"},
-                {"role": "validation_specialist", "responsibility": "Validate data integrity"},
-                {"role": "monitoring_agent", "responsibility": "Monitor system health"}
-            ],
-            "data_analysis": [
-                {"role": "data_collector", "responsibility": "Collect and aggregate data"},
-                {"role": "data_processor", "responsibility": "Process and clean data"},
-                {"role": "analytics_engine", "responsibility": "Perform data analysis"},
-                {"role": "report_generator", "responsibility": "Generate insights and reports"},
-                {"role": "visualization_specialist", "responsibility": "Create data visualizations"}
-            ],
-            "system_development": [
-                {"role": "requirements_analyst", "responsibility": "Analyze business requirements"},
-                {"role": "system_architect", "responsibility": "Design system architecture"},
-                {"role": "code_generator", "responsibility": "Generate production-ready code"},
-                {"role": "quality_assurance", "responsibility": "Validate system quality"},
-                {"role": "deployment_engineer", "responsibility": "Deploy and monitor system"}
-            ]
-        }
-        
-        return role_templates.get(category, [
-            {"role": "data_processor", "responsibility": "Process input data"},
-            {"role": "task_executor", "responsibility": "Execute automation tasks"},
-            {"role": "output_formatter", "responsibility": "Format and deliver results"}
-        ])
+    ALLOW_METHODS = b"DELETE, GET, HEAD, OPTIONS, PATCH, POST, PUT"
+    MAX_AGE = b"600"
     
-    def _get_fallback_workflow_steps(self, category: str):
-        """Get fallback workflow steps based on category"""
-        return [
-            {"step": "input_validation", "description": "Validate and prepare input data"},
-            {"step": "main_processing", "description": f"Execute {category.replace('_', ' ')} workflow"},
-            {"step": "quality_assurance", "description": "Check results and handle errors"},
-            {"step": "output_delivery", "description": "Format and deliver final results"}
-        ]
+    def __init__(self, app, origins):
+        self.app = app
+        self.origins = frozenset(origin.encode() for origin in origins)
     
-    def _get_fallback_apis(self, user_input: str, category: str):
-        """Suggest APIs based on input content"""
-        apis = []
-        user_lower = user_input.lower()
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
         
-        # Common API suggestions based on keywords
-        if 'email' in user_lower:
-            apis.extend(['Gmail API', 'SendGrid API'])
-        if 'social' in user_lower:
-            apis.extend(['Twitter API', 'LinkedIn API', 'Facebook API'])
-        if 'wordpress' in user_lower or 'blog' in user_lower:
-            apis.extend(['WordPress API'])
-        if 'analytics' in user_lower:
-            apis.extend(['Google Analytics API'])
-        if 'crm' in user_lower:
-            apis.extend(['Salesforce API', 'HubSpot API'])
-        if 'slack' in user_lower:
-            apis.extend(['Slack API'])
+        origin = None
+        request_method = None
+        request_headers = None
+        for name, value in scope["headers"]:
+            if name == b"origin":
+                origin = value
+            elif name == b"access-control-request-method":
+                request_method = value
+            elif name == b"access-control-request-headers":
+                request_headers = value
         
-        # Category-based defaults
-        if not apis:
-            category_apis = {
-                "content_creation": ["OpenAI API", "WordPress API", "Social Media APIs"],
-                "system_integration": ["REST APIs", "Database connectors", "Webhook APIs"],
-                "data_analysis": ["Data APIs", "Analytics APIs", "Visualization APIs"],
-                "system_development": ["OpenAI API", "GitHub API", "Cloud Platform APIs"]
-            }
-            apis = category_apis.get(category, ["REST APIs", "Webhook APIs"])
+        if origin is None:
+            await self.app(scope, receive, send)
+            return
         
-        return apis
-
-class FallbackSystemArchitect:
-    """System architect that works without API keys"""
-    
-    def design_crew_architecture(self, tech_spec: TechnicalSpecification) -> CrewArchitecture:
-        """Design crew architecture using fallback logic"""
-        
-        # Generate agents
-        agents = []
-        for i, role_info in enumerate(tech_spec.agent_roles_needed):
-            role = role_info['role']
-            responsibility = role_info['responsibility']
-            
-            agent = AgentSpecification(
-                name=f"{role}_agent",
-                role=role.replace('_', ' ').title(),
-                goal=f"Efficiently {responsibility.lower()} with high quality and reliability",
-                backstory=f"You are a specialized AI agent expert in {role.replace('_', ' ')}. "
-                         f"You have extensive experience in {responsibility.lower()} and work collaboratively "
-                         f"with other agents to achieve optimal business outcomes.",
-                tools=self._get_tools_for_role(role),
-                max_iter=5,
-                memory=True,
-                verbose=True,
-                allow_delegation=False
-            )
-            agents.append(agent)
+        allowed = origin in self.origins
         
-        # Generate tasks
-        tasks = []
-        for i, step_info in enumerate(tech_spec.workflow_steps):
-            step = step_info['step']
-            description = step_info['description']
-            agent_name = agents[i % len(agents)].name
+        # Preflight: answer directly without running the app
+        if scope["method"] == "OPTIONS" and request_method is not None:
+            if not allowed:
+                await send({
+                    "type": "http.response.start",
+                    "status": 400,
+                    "headers": [(b"content-type", b"text/plain; charset=utf-8"), (b"vary", b"Origin")],
+                })
+                await send({"type": "http.response.body", "body": b"Disallowed CORS origin"})
+                return
             
-            task = TaskSpecification(
-                name=f"{step}_task",
-                description=f"Execute {description}. Ensure high quality output and proper validation.",
-                agent_name=agent_name,
-                expected_output=f"Completed {step} with validated results and clear status report",
-                depends_on=[tasks[i-1].name] if i > 0 else [],
-                output_format="structured_data"
-            )
-            tasks.append(task)
-        
-        # Generate workflow
-        workflow = CrewWorkflow(
-            name=f"{tech_spec.complexity_estimate}_automation_workflow",
-            description=f"Coordinated workflow for {tech_spec.complexity_estimate} business automation",
-            task_sequence=[task.name for task in tasks],
-            parallel_tasks=[],
-            decision_points=[]
-        )
+            headers = [
+                (b"access-control-allow-origin", origin),
+                (b"access-control-allow-credentials", b"true"),
+                (b"access-control-allow-methods", self.ALLOW_METHODS),
+                (b"access-control-max-age", self.MAX_AGE),
+                (b"vary", b"Origin"),
+            ]
+            if request_headers is not None:
+                headers.append((b"access-control-allow-headers", request_headers))
+            await send({"type": "http.response.start", "status": 204, "headers": headers})
+            await send({"type": "http.response.body", "body": b""})
+            return
         
-        # Resource estimation
-        resource_map = {
-            "simple": {"runtime": "5-15 minutes", "memory": "1GB", "cpu": "1 core"},
-            "moderate": {"runtime": "15-30 minutes", "memory": "2GB", "cpu": "2 cores"},
-            "complex": {"runtime": "30-60 minutes", "memory": "4GB", "cpu": "4 cores"}
-        }
+        if not allowed:
+            await self.app(scope, receive, send)
+            return
         
-        resources = resource_map[tech_spec.complexity_estimate]
+        async def send_with_cors(message):
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.append((b"access-control-allow-origin", origin))
+                headers.append((b"access-control-allow-credentials", b"true"))
+                headers.append((b"vary", b"Origin"))
+                message = {**message, "headers": headers}
+            await send(message)
         
-        return CrewArchitecture(
-            crew_name=f"{tech_spec.complexity_estimate}_automation_crew",
-            crew_description=f"AI-powered {tech_spec.complexity_estimate} automation crew with {len(agents)} specialized agents",
-            agents=agents,
-            tasks=tasks,
-            workflow=workflow,
-            estimated_runtime=resources["runtime"],
-            resource_requirements={"memory": resources["memory"], "cpu": resources["cpu"]},
-            success_metrics=["task_completion_rate", "output_quality", "execution_time", "user_satisfaction"],
-            dependencies=["crewai"] + tech_spec.apis_required
-        )
-    
-    def _get_tools_for_role(self, role: str):
-        """Get appropriate tools for each role"""
-        tool_mapping = {
-            'content_researcher': ['web_search', 'trend_analyzer', 'competitor_monitor'],
-            'content_generator': ['text_generator', 'template_engine', 'content_formatter'],
-            'seo_optimizer': ['keyword_analyzer', 'seo_checker', 'readability_analyzer'],
-            'publishing_manager': ['social_scheduler', 'cms_publisher', 'analytics_tracker'],
-            'requirements_analyst': ['requirement_parser', 'business_analyzer', 'specification_generator'],
-            'system_architect': ['architecture_designer', 'workflow_optimizer', 'resource_estimator'],
-            'code_generator': ['code_templates', 'syntax_validator', 'documentation_generator'],
-            'quality_assurance': ['test_generator', 'code_validator', 'performance_monitor'],
-            'deployment_engineer': ['deployment_automator', 'environment_manager', 'monitoring_setup']
-        }
-        return tool_mapping.get(role, ['basic_tools', 'file_handler', 'api_client'])
+        await self.app(scope, receive, send_with_cors)
 
-# Global instances
-requirements_analyst = FallbackRequirementsAnalyst()
-system_architect = FallbackSystemArchitect()
+# Configure CORS
+app.add_middleware(
+    FastCORS,
+    origins=["http://localhost:3000", "http://127.0.0.1:3000"],
+)
 
-def run_fallback_pipeline(requirement: str) -> Dict[str, Any]:
-    """Run a simplified pipeline using fallback logic only"""
-    
-    try:
-        print(f"Running fallback pipeline for: {requirement[:100]}...")
-        
-        # Stage 1: Requirements Analysis
-        print("Stage 1: Analyzing business requirements...")
-        tech_spec = requirements_analyst.analyze_requirements(requirement)
-        
-        # Stage 2: System Architecture
-        print("Stage 2: Designing crew architecture...")
-        crew_architecture = system_architect.design_crew_architecture(tech_spec)
-        
-        # Build response
-        result = {
-            'systemName': extract_system_name(requirement),
-            'agents': len(crew_architecture.agents),
-            'complexity': tech_spec.complexity_estimate,
-            'estimatedTime': crew_architecture.estimated_runtime,
-            'estimatedCost': estimate_cost(tech_spec.complexity_estimate, len(crew_architecture.agents)),
-            'architecture': {
-                'crew_name': crew_architecture.crew_name,
-                'crew_description': crew_architecture.crew_description,
-                'agents': [
-                    {
-                        'name': agent.name,
-                        'role': agent.role,
-                        'goal': agent.goal[:60] + '...' if len(agent.goal) > 60 else agent.goal
-                    }
-                    for agent in crew_architecture.agents
-                ],
-                'tasks': [
-                    {
-                        'name': task.name,
-                        'description': task.description[:50] + '...' if len(task.description) > 50 else task.description,
-                        'agent_name': task.agent_name
-                    }
-                    for task in crew_architecture.tasks
-                ],
-                'estimated_runtime': crew_architecture.estimated_runtime,
-                'workflow_name': crew_architecture.workflow.name
-            },
-            'deployment': {
-                'platform': "Railway",
-                'estimatedSetupTime': "15-30 minutes",
-                'monthlyRunningCost': estimate_cost(tech_spec.complexity_estimate, len(crew_architecture.agents))
-            },
-            'generatedAt': datetime.now().isoformat(),
-            'complexity_score': get_complexity_score(tech_spec.complexity_estimate),
-            'pipeline_stages': [
-                {
-                    'stage': 'Requirements Analysis',
-                    'status': 'completed',
-                    'output': {
-                        'complexity': tech_spec.complexity_estimate,
-                        'estimated_agents': tech_spec.estimated_agents,
-                        'agent_roles': tech_spec.agent_roles_needed[:3],
-                        'apis_required': tech_spec.apis_required[:3]
-                    }
-                },
-                {
-                    'stage': 'System Architecture', 
-                    'status': 'completed',
-                    'output': {
-                        'crew_name': crew_architecture.crew_name,
-                        'agents_designed': len(crew_architecture.agents),
-                        'tasks_defined': len(crew_architecture.tasks),
-                        'workflow': crew_architecture.workflow.name
-                    }
-                },
-                {
-                    'stage': 'Fallback Mode',
-                    'status': 'completed',
-                    'output': {
-                        'note': 'Running in fallback mode without OpenAI API keys',
-                        'recommendation': 'Add OpenAI API key for enhanced AI-powered analysis'
-                    }
-                }
-            ]
-        }
-        
-        print(" Fallback pipeline completed successfully!")
-        return result
-        
-    except Exception as e:
-        print(f" Fallback pipeline error: {e}")
-        traceback.print_exc()
-        raise
+# Request/Response Models
+class GenerationRequest(BaseModel):
+    requirement: str
 
-def extract_system_name(requirement: str) -> str:
-    """Extract a reasonable system name from the requirement"""
-    keywords = ['automate', 'automation', 'system', 'platform', 'solution', 'tool', 'assistant', 'bot']
-    domains = ['content', 'marketing', 'sales', 'customer', 'email', 'social', 'data', 'inventory', 'finance', 'hr']
-    
-    requirement_lower = requirement.lower()
-    
-    found_domain = None
-    found_keyword = None
-    
-    for domain in domains:
-        if domain in requirement_lower:
-            found_domain = domain
-            break
-    
-    for keyword in keywords:
-        if keyword in requirement_lower:
-            found_keyword = keyword
-            break
-    
-    if found_domain and found_keyword:
-        return f"{found_domain.title()} {found_keyword.title()}"
-    elif found_domain:
-        return f"{found_domain.title()} System"
-    elif found_keyword:
-        return f"Business {found_keyword.title()}"
-    else:
-        return "Business Automation System"
+# Worker processes for the CPU-bound fallback pipeline; until startup
+# creates them, run_in_executor falls back to the default thread pool
+_pipeline_executor = None
 
-def estimate_cost(complexity: str, agent_count: int) -> str:
-    """Estimate monthly cost"""
-    base_costs = {'simple': 25, 'moderate': 50, 'complex': 100}
-    base_cost = base_costs.get(complexity, 50)
-    agent_cost = agent_count * 10
-    total_cost = base_cost + agent_cost
-    return f"${total_cost}-{total_cost + 50}"
+def start_queued_logging():
+    """Route root logger records through the queue and start its listener (idempotent)"""
+    global _logging_started
+    if _logging_started:
+        return
+    _logging_started = True
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s %(levelname)s %(name)s: %(message)s",
+        handlers=[logging.handlers.QueueHandler(_log_queue)]
+    )
+    _log_listener.start()
+    atexit.register(_log_listener.stop)
+
+@app.on_event("startup")
+async def start_pipeline_executor():
+    """Start queued logging and the fallback pipeline process pool"""
+    global _pipeline_executor
+    start_queued_logging()
+    
+    # Every uvicorn worker (WEB_CONCURRENCY, set by __main__ below) runs this
+    # hook, so with several of them each keeps a small pool of its own share
+    # of the cores instead of cpu_count processes apiece
+    web_workers = int(os.getenv("WEB_CONCURRENCY", "1"))
+    cpus = os.cpu_count() or 1
+    pool_size = cpus if web_workers <= 1 else max(1, min(2, cpus // web_workers))
+    # spawn avoids forking a process that already runs an event loop (and is the macOS default)
+    _pipeline_executor = ProcessPoolExecutor(
+        max_workers=pool_size,
+        mp_context=multiprocessing.get_context("spawn")
+    )
 
-def get_complexity_score(complexity: str) -> int:
-    """Convert complexity to numeric score"""
-    mapping = {'simple': 1, 'moderate': 2, 'complex': 3}
-    return mapping.get(complexity, 2)
+@app.on_event("shutdown")
+async def stop_pipeline_executor():
+    """Shut down the fallback pipeline process pool"""
+    global _pipeline_executor
+    if _pipeline_executor is not None:
+        _pipeline_executor.shutdown(wait=False, cancel_futures=True)
+        _pipeline_executor = None
 
 # API Endpoints
-@app.get("/")
+@app.get("/", response_class=ORJSONResponse)
 async def root():
     """Health check endpoint"""
     return {
@@ -425,17 +192,17 @@ async def root():
         "mode": "fallback"
     }
 
-@app.get("/health")
+@app.get("/health", response_class=ORJSONResponse)
 async def health_check():
     """Detailed health check"""
     return {
         "status": "healthy",
         "mode": "fallback",
         "api_keys_required": False,
-        "timestamp": datetime.now().isoformat()
+        "timestamp": _iso_now()
     }
 
-@app.post("/api/generate", response_model=GenerationResponse)
+@app.post("/api/generate", response_class=ORJSONResponse)
 async def generate_system(request: GenerationRequest):
     """Generate a system using fallback logic (no API keys required)"""
     
@@ -443,32 +210,35 @@ async def generate_system(request: GenerationRequest):
         if not request.requirement or not request.requirement.strip():
             raise HTTPException(status_code=400, detail="Valid requirement string is required")
         
-        print(f"Generation request received: {request.requirement[:100]}...")
+        logger.info("Generation request received: %s...", request.requirement[:100])
         
-        # Run the fallback pipeline
-        result = run_fallback_pipeline(request.requirement)
+        # Run the CPU-bound fallback pipeline in a worker process, off the event loop
+        loop = asyncio.get_running_loop()
+        result = await loop.run_in_executor(_pipeline_executor, run_fallback_pipeline, request.requirement)
         
-        print(f" Generation completed successfully!")
+        logger.info("Generation completed successfully!")
         
-        return GenerationResponse(
-            success=True,
-            data=result
-        )
+        # The result is built internally, so skip response-model validation
+        return ORJSONResponse({"success": True, "data": result, "error": None})
         
     except Exception as e:
-        print(f" Generation error: {e}")
-        traceback.print_exc()
+        status_code = e.status_code if isinstance(e, HTTPException) else 500
+        if status_code < 500:
+            # Bad client requests are expected; a traceback would only add noise
+            logger.warning("Generation rejected (%s): %s", status_code, e.detail)
+        else:
+            logger.exception("Generation error: %s", e)
         
-        return GenerationResponse(
-            success=False,
-            error=f"Generation failed: {str(e)}"
+        return ORJSONResponse(
+            {"success": False, "data": None, "error": f"Generation failed: {str(e)}"},
+            status_code=status_code
         )
 
-@app.post("/api/feedback")
+@app.post("/api/feedback", response_class=ORJSONResponse)
 async def collect_feedback(feedback_data: Dict[str, Any]):
     """Collect user feedback"""
     try:
-        print(f"Feedback received: {feedback_data}")
+        logger.info("Feedback received: %s", feedback_data)
         return {"success": True, "message": "Feedback collected successfully"}
     except Exception as e:
         return {"success": False, "error": str(e)}
@@ -484,10 +254,21 @@ if __name__ == "__main__":
     print(" API: http://localhost:8000")
     print(" Docs: http://localhost:8000/docs")
     
+    # uvloop and httptools ship with uvicorn[standard] (uvloop is not available on Windows).
+    # Auto-reload only in development; it cannot be combined with multiple workers.
+    development = os.getenv('ENVIRONMENT', 'development') == 'development'
+    workers = 1 if development else int(os.getenv("WEB_CONCURRENCY", os.cpu_count() or 1))
+    # Inherited by the worker processes, which size their pipeline pools from it
+    os.environ["WEB_CONCURRENCY"] = str(workers)
+    
     uvicorn.run(
         "api_server_fallback:app",
         host="0.0.0.0",
         port=8000,
-        reload=True,
-        log_level="info"
+        loop="asyncio" if sys.platform == "win32" else "uvloop",
+        http="httptools",
+        reload=development,
+        workers=workers,
+        log_level="info" if development else "warning",
+        access_log=development
     )
@@ -4,50 +4,76 @@ CrewBuilder API Server with User API Key Support
 Proof of concept for web-based API key management
 """
 
+import os
 import sys
+import asyncio
 from pathlib import Path
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, Tuple
 import json
-import traceback
-from datetime import datetime
+import copy
+import functools
+from collections import OrderedDict
+import logging
 import hashlib
-import base64
+import orjson
+
+# Prefer the SIMD-accelerated pybase64 when installed (same API as base64)
+try:
+    import pybase64 as _b64
+except ImportError:
+    import base64 as _b64
 
 # Add the project root to Python path
 project_root = Path(__file__).parent
 sys.path.insert(0, str(project_root))
 
 # FastAPI imports
-from fastapi import FastAPI, HTTPException, Depends, Header
-from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
-from config import CrewBuilderConfig
+from fastapi import FastAPI, HTTPException, Depends, Header, Request
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import ORJSONResponse, Response
+from pydantic import BaseModel, TypeAdapter, ValidationError
+from config import CrewBuilderConfig, get_config
 
 # Import fallback functionality
-from api_server_fallback import (
+from api_server_fallback import FastCORS, start_queued_logging
+from fallback_pipeline import (
     FallbackRequirementsAnalyst, 
     FallbackSystemArchitect,
     extract_system_name,
     estimate_cost,
-    get_complexity_score
+    get_complexity_score,
+    _ellipsize,
+    _iso_now,
+    _CACHEABLE_REQUIREMENT_LENGTH
 )
 
+# Records go through the queued handler that start_queued_logging installs on
+# the root logger at startup, so request handlers never block on stdout
+logger = logging.getLogger("crewbuilder.user_keys")
+logger.setLevel(logging.INFO if os.getenv('ENVIRONMENT', 'development') == 'development' else logging.WARNING)
+
+# Full tracebacks are only formatted when CREWBUILDER_DEBUG=1; otherwise errors log one line
+_DEBUG = os.getenv('CREWBUILDER_DEBUG') == '1'
+
 # Create FastAPI app
 app = FastAPI(
     title="CrewBuilder API with User Key Support",
     description="AI Agent Meta-System with flexible API key management",
-    version="1.1.0"
+    version="1.1.0",
+    default_response_class=ORJSONResponse
 )
 
-# Configure CORS
+# Configure CORS (origins are checked against a frozenset, credentials allowed)
 app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["http://localhost:3000", "http://127.0.0.1:3000"],
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
+    FastCORS,
+    origins=["http://localhost:3000", "http://127.0.0.1:3000"],
 )
 
+@app.on_event("startup")
+async def start_logging():
+    """Start queued logging"""
+    start_queued_logging()
+
 # Request/Response Models
 class GenerationRequest(BaseModel):
     requirement: str
@@ -66,39 +92,93 @@ class GenerationResponse(BaseModel):
     api_mode: str = "fallback"  # Which API was used
     cost_info: Dict[str, Any] = None
 
-# Simple in-memory storage for demo (use encrypted database in production)
-user_api_keys = {}
+# Build the request schema up front and reuse one adapter for every request
+GenerationRequest.model_rebuild()
+_GENERATION_REQUEST = TypeAdapter(GenerationRequest)
+
+# Simple in-memory storage for demo (use encrypted database in production).
+# Sharded on the first byte of the user hash so concurrent writers rarely touch
+# the same dict; each shard is kept in LRU order and capped so it cannot grow
+# without bound.
+MAX_STORED_USERS = 100_000
+USER_KEY_SHARDS = 256
+_MAX_USERS_PER_SHARD = MAX_STORED_USERS // USER_KEY_SHARDS
+user_api_key_shards = tuple(OrderedDict() for _ in range(USER_KEY_SHARDS))
+
+def _user_key_shard(user_hash: str) -> OrderedDict:
+    """Shard holding the given user hash (hex SHA-256, so uniformly spread)"""
+    return user_api_key_shards[int(user_hash[:2], 16)]
+
+def save_user_keys(user_hash: str, stored_keys: Dict[str, str]) -> None:
+    """Store a user's encrypted keys, evicting the shard's least recently used user if full"""
+    shard = _user_key_shard(user_hash)
+    shard[user_hash] = stored_keys
+    shard.move_to_end(user_hash)
+    if len(shard) > _MAX_USERS_PER_SHARD:
+        shard.popitem(last=False)
+
+def load_user_keys(user_hash: str) -> Dict[str, str]:
+    """Get a user's encrypted keys (empty if unknown), marking them recently used"""
+    shard = _user_key_shard(user_hash)
+    stored_keys = shard.get(user_hash)
+    if stored_keys is None:
+        return {}
+    shard.move_to_end(user_hash)
+    return stored_keys
+
+# hashlib.sha256 is already OpenSSL's constructor (SHA-NI accelerated where the CPU has it).
+# Copying an empty prototype skips re-initialising the hash state on every call;
+# the prototype itself is never updated, so sharing it across threads is safe.
+_SHA256_PROTO = hashlib.sha256()
 
 def hash_user_id(user_id: str) -> str:
-    """Create a hash of user ID for secure storage"""
-    return hashlib.sha256(user_id.encode()).hexdigest()
+    """Create a hash of user ID for secure storage
+    
+    Stays on SHA-256 rather than BLAKE2b: switching algorithms would change
+    every stored hash and orphan keys saved under the old ones.
+    """
+    h = _SHA256_PROTO.copy()
+    h.update(user_id.encode())
+    return h.hexdigest()
 
 def simple_encrypt(text: str) -> str:
     """Simple encryption for demo (use proper encryption in production)"""
-    return base64.b64encode(text.encode()).decode()
+    return _b64.b64encode(text.encode()).decode()
 
 def simple_decrypt(encrypted_text: str) -> str:
     """Simple decryption for demo"""
     try:
-        return base64.b64decode(encrypted_text.encode()).decode()
+        return _b64.b64decode(encrypted_text.encode()).decode()
     except:
         return ""
 
+def build_user_key_entry(user_id: str, openai_key: Optional[str] = None,
+                         anthropic_key: Optional[str] = None) -> Tuple[str, Dict[str, str]]:
+    """Hash a user ID and encrypt their keys in one call, ready for save_user_keys"""
+    stored_keys = {}
+    if openai_key:
+        stored_keys['openai'] = simple_encrypt(openai_key)
+    if anthropic_key:
+        stored_keys['anthropic'] = simple_encrypt(anthropic_key)
+    return hash_user_id(user_id), stored_keys
+
 def get_effective_config(user_api_key: Optional[str] = None, preferred_model: str = "fallback") -> CrewBuilderConfig:
     """Get effective configuration based on user preferences and available keys"""
     
-    # Start with system config
-    config = CrewBuilderConfig()
+    # Start with the shared system config (built once at import)
+    config = get_config()
     
     # Override with user-provided key if available
     if user_api_key and user_api_key.startswith('sk-'):
-        # Create a temporary config with user's key
-        temp_config = CrewBuilderConfig()
+        # Copy so the user's key never leaks into the shared config
         if preferred_model == "openai":
+            temp_config = copy.copy(config)
             temp_config.openai_api_key = user_api_key
+            return temp_config
         elif preferred_model == "anthropic":
+            temp_config = copy.copy(config)
             temp_config.anthropic_api_key = user_api_key
-        return temp_config
+            return temp_config
     
     return config
 
@@ -114,7 +194,7 @@ def run_enhanced_pipeline(requirement: str, config: CrewBuilderConfig) -> Dict[s
             result['model_used'] = 'openai' if config.has_openai else 'anthropic'
             return result
         except Exception as e:
-            print(f"AI pipeline failed, falling back: {e}")
+            logger.warning("AI pipeline failed, falling back: %s", e)
             # Fall back to basic mode
             pass
     
@@ -123,22 +203,41 @@ def run_enhanced_pipeline(requirement: str, config: CrewBuilderConfig) -> Dict[s
     result['api_mode'] = 'fallback'
     return result
 
+def _enhanced_analysis_stage(complexity: str) -> Dict[str, Any]:
+    """Last pipeline stage of an enhanced response; only the complexity varies"""
+    return {
+        'stage': 'Enhanced Analysis',
+        'status': 'completed',
+        'output': {
+            'business_category': 'auto_detected',
+            'integration_complexity': complexity,
+            'deployment_recommendation': 'Railway (optimal cost/performance)',
+            'success_probability': '85-95%'
+        }
+    }
+
+# Prebuilt for every complexity the analyst can report; responses share these read-only
+_ENHANCED_ANALYSIS_STAGES = {
+    complexity: _enhanced_analysis_stage(complexity)
+    for complexity in ('simple', 'moderate', 'complex')
+}
+
 def run_fallback_pipeline_enhanced(requirement: str) -> Dict[str, Any]:
     """Enhanced fallback pipeline with better analysis"""
     
     try:
-        print(f"Running enhanced fallback pipeline for: {requirement[:100]}...")
+        logger.info("Running enhanced fallback pipeline for: %s...", requirement[:100])
         
         # Use fallback analysts
         analyst = FallbackRequirementsAnalyst()
         architect = FallbackSystemArchitect()
         
         # Stage 1: Requirements Analysis
-        print("Stage 1: Analyzing business requirements...")
+        logger.info("Stage 1: Analyzing business requirements...")
         tech_spec = analyst.analyze_requirements(requirement)
         
         # Stage 2: System Architecture
-        print("Stage 2: Designing crew architecture...")
+        logger.info("Stage 2: Designing crew architecture...")
         crew_architecture = architect.design_crew_architecture(tech_spec)
         
         # Enhanced analysis based on keywords and patterns
@@ -146,6 +245,7 @@ def run_fallback_pipeline_enhanced(requirement: str) -> Dict[str, Any]:
         estimated_cost = estimate_cost(tech_spec.complexity_estimate, len(crew_architecture.agents))
         
         # Build comprehensive response
+        ellipsize = _ellipsize
         result = {
             'systemName': extract_system_name(requirement),
             'agents': len(crew_architecture.agents),
@@ -159,7 +259,7 @@ def run_fallback_pipeline_enhanced(requirement: str) -> Dict[str, Any]:
                     {
                         'name': agent.name,
                         'role': agent.role,
-                        'goal': agent.goal[:80] + '...' if len(agent.goal) > 80 else agent.goal,
+                        'goal': ellipsize(agent.goal, 80),
                         'tools': agent.tools[:3]  # Show first 3 tools
                     }
                     for agent in crew_architecture.agents
@@ -167,7 +267,7 @@ def run_fallback_pipeline_enhanced(requirement: str) -> Dict[str, Any]:
                 'tasks': [
                     {
                         'name': task.name,
-                        'description': task.description[:60] + '...' if len(task.description) > 60 else task.description,
+                        'description': ellipsize(task.description, 60),
                         'agent_name': task.agent_name,
                         'depends_on': task.depends_on
                     }
@@ -183,7 +283,7 @@ def run_fallback_pipeline_enhanced(requirement: str) -> Dict[str, Any]:
                 'monthlyRunningCost': estimated_cost,
                 'complexity_score': complexity_score
             },
-            'generatedAt': datetime.now().isoformat(),
+            'generatedAt': _iso_now(),
             'complexity_score': complexity_score,
             'pipeline_stages': [
                 {
@@ -206,67 +306,70 @@ def run_fallback_pipeline_enhanced(requirement: str) -> Dict[str, Any]:
                         'workflow': crew_architecture.workflow.name
                     }
                 },
-                {
-                    'stage': 'Enhanced Analysis',
-                    'status': 'completed',
-                    'output': {
-                        'business_category': 'auto_detected',
-                        'integration_complexity': tech_spec.complexity_estimate,
-                        'deployment_recommendation': 'Railway (optimal cost/performance)',
-                        'success_probability': '85-95%'
-                    }
-                }
+                _ENHANCED_ANALYSIS_STAGES.get(tech_spec.complexity_estimate)
+                or _enhanced_analysis_stage(tech_spec.complexity_estimate)
             ]
         }
         
-        print("✅ Enhanced pipeline completed successfully!")
+        logger.info("Enhanced pipeline completed successfully!")
         return result
         
     except Exception as e:
-        print(f"❌ Enhanced pipeline error: {e}")
-        traceback.print_exc()
+        if _DEBUG:
+            logger.exception("Enhanced pipeline error: %s", e)
+        else:
+            logger.error("Enhanced pipeline error: %s: %s", type(e).__name__, e)
         raise
 
+_run_fallback_pipeline_cached = functools.lru_cache(maxsize=512)(run_fallback_pipeline_enhanced)
+
+def fallback_result(requirement: str) -> Dict[str, Any]:
+    """Fallback pipeline result, memoized per requirement since fallback mode is deterministic"""
+    if len(requirement) >= _CACHEABLE_REQUIREMENT_LENGTH:
+        return run_fallback_pipeline_enhanced(requirement)
+    # Callers only ever set top-level keys, so a shallow copy keeps the cached entry intact
+    result = dict(_run_fallback_pipeline_cached(requirement))
+    result['generatedAt'] = _iso_now()
+    return result
+
+# Health-check payloads are constant apart from the timestamp, so encode them once
+_ROOT_BODY = orjson.dumps({
+    "message": "CrewBuilder API with User Key Support",
+    "version": "1.1.0",
+    "status": "operational",
+    "features": ["fallback_mode", "user_api_keys", "enhanced_analysis"]
+})
+_HEALTH_PREFIX = orjson.dumps({
+    "status": "healthy",
+    "api_key_support": True,
+    "system_keys_available": get_config().has_ai_api,
+    "fallback_mode_ready": True
+})[:-1] + b',"timestamp":"'
+
 # API Endpoints
-@app.get("/")
+@app.get("/", response_class=ORJSONResponse)
 async def root():
     """Health check endpoint"""
-    return {
-        "message": "CrewBuilder API with User Key Support",
-        "version": "1.1.0",
-        "status": "operational",
-        "features": ["fallback_mode", "user_api_keys", "enhanced_analysis"]
-    }
+    return Response(_ROOT_BODY, media_type="application/json")
 
-@app.get("/health")
+@app.get("/health", response_class=ORJSONResponse)
 async def health_check():
     """Detailed health check"""
-    config = CrewBuilderConfig()
-    return {
-        "status": "healthy",
-        "api_key_support": True,
-        "system_keys_available": config.has_ai_api,
-        "fallback_mode_ready": True,
-        "timestamp": datetime.now().isoformat()
-    }
+    return Response(
+        _HEALTH_PREFIX + _iso_now().encode() + b'"}',
+        media_type="application/json"
+    )
 
-@app.post("/api/user-keys", response_model=dict)
+@app.post("/api/user-keys", response_model=dict, response_class=ORJSONResponse)
 async def store_user_api_keys(request: UserAPIKeyRequest):
     """Store user API keys securely (demo implementation)"""
     
     try:
-        user_hash = hash_user_id(request.user_id)
-        
         # Encrypt and store keys (use proper encryption in production)
-        stored_keys = {}
-        if request.openai_key:
-            stored_keys['openai'] = simple_encrypt(request.openai_key)
-        if request.anthropic_key:
-            stored_keys['anthropic'] = simple_encrypt(request.anthropic_key)
+        user_hash, stored_keys = build_user_key_entry(request.user_id, request.openai_key, request.anthropic_key)
+        save_user_keys(user_hash, stored_keys)
         
-        user_api_keys[user_hash] = stored_keys
-        
-        print(f"Stored API keys for user: {user_hash[:8]}...")
+        logger.info("Stored API keys for user: %s...", user_hash[:8])
         
         return {
             "success": True,
@@ -275,16 +378,16 @@ async def store_user_api_keys(request: UserAPIKeyRequest):
         }
         
     except Exception as e:
-        print(f"Error storing user keys: {e}")
+        logger.error("Error storing user keys: %s", e)
         raise HTTPException(status_code=500, detail="Failed to store API keys")
 
-@app.get("/api/user-keys/{user_id}")
+@app.get("/api/user-keys/{user_id}", response_class=ORJSONResponse)
 async def get_user_api_key_status(user_id: str):
     """Get status of user's stored API keys (without revealing keys)"""
     
     try:
         user_hash = hash_user_id(user_id)
-        stored_keys = user_api_keys.get(user_hash, {})
+        stored_keys = load_user_keys(user_hash)
         
         return {
             "has_openai_key": "openai" in stored_keys,
@@ -295,27 +398,44 @@ async def get_user_api_key_status(user_id: str):
     except Exception as e:
         return {"error": str(e)}
 
-@app.post("/api/generate", response_model=GenerationResponse)
-async def generate_system(request: GenerationRequest):
+@app.post(
+    "/api/generate",
+    response_model=GenerationResponse,
+    response_class=ORJSONResponse,
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {"application/json": {"schema": GenerationRequest.model_json_schema()}}
+        }
+    }
+)
+async def generate_system(raw_request: Request):
     """Generate system with flexible API key support"""
     
+    # Validate the raw body in a single pydantic-core pass (no intermediate dict)
+    try:
+        request = _GENERATION_REQUEST.validate_json(await raw_request.body())
+    except ValidationError as e:
+        raise RequestValidationError(e.errors())
+    
     try:
         if not request.requirement or not request.requirement.strip():
             raise HTTPException(status_code=400, detail="Valid requirement string is required")
         
-        print(f"Generation request: {request.requirement[:100]}...")
-        print(f"User API key provided: {'Yes' if request.user_api_key else 'No'}")
-        print(f"Preferred model: {request.preferred_model}")
+        logger.info(
+            "Generation request: %s... (user API key provided: %s, preferred model: %s)",
+            request.requirement[:100], "Yes" if request.user_api_key else "No", request.preferred_model
+        )
         
         # Get effective configuration
         config = get_effective_config(request.user_api_key, request.preferred_model)
         
-        # Run pipeline based on available APIs
+        # Run pipeline based on available APIs (CPU-bound, so off the event loop)
         if config.has_ai_api and request.preferred_model != "fallback":
-            result = run_enhanced_pipeline(request.requirement, config)
+            result = await asyncio.to_thread(run_enhanced_pipeline, request.requirement, config)
             api_mode = "ai_enhanced"
         else:
-            result = run_fallback_pipeline_enhanced(request.requirement)
+            result = await asyncio.to_thread(fallback_result, request.requirement)
             api_mode = "fallback"
         
         # Add cost information
@@ -326,30 +446,37 @@ async def generate_system(request: GenerationRequest):
             "total_monthly_estimate": result.get('deployment', {}).get('monthlyRunningCost', '$50-100')
         }
         
-        print(f"✅ Generation completed in {api_mode} mode!")
+        logger.info("Generation completed in %s mode!", api_mode)
         
-        return GenerationResponse(
-            success=True,
-            data=result,
-            api_mode=api_mode,
-            cost_info=cost_info
-        )
+        # The result is built internally, so encode it in one orjson pass instead
+        # of validating it against GenerationResponse and walking it again
+        return ORJSONResponse({
+            "success": True,
+            "data": result,
+            "error": None,
+            "api_mode": api_mode,
+            "cost_info": cost_info
+        })
         
     except Exception as e:
-        print(f"❌ Generation error: {e}")
-        traceback.print_exc()
+        if _DEBUG:
+            logger.exception("Generation error: %s", e)
+        else:
+            logger.error("Generation error: %s: %s", type(e).__name__, e)
         
-        return GenerationResponse(
-            success=False,
-            error=f"Generation failed: {str(e)}",
-            api_mode="error"
-        )
+        return ORJSONResponse({
+            "success": False,
+            "data": None,
+            "error": f"Generation failed: {str(e)}",
+            "api_mode": "error",
+            "cost_info": None
+        })
 
-@app.post("/api/feedback")
+@app.post("/api/feedback", response_class=ORJSONResponse)
 async def collect_feedback(feedback_data: Dict[str, Any]):
     """Collect user feedback for improvements"""
     try:
-        print(f"Feedback received: {feedback_data}")
+        logger.info("Feedback received: %s", feedback_data)
         return {"success": True, "message": "Feedback collected successfully"}
     except Exception as e:
         return {"success": False, "error": str(e)}
@@ -371,10 +498,19 @@ if __name__ == "__main__":
     print("   • User Keys: POST /api/user-keys")
     print("   • Generation: POST /api/generate")
     
+    # uvloop and httptools ship with uvicorn[standard] (uvloop is not available on Windows).
+    # Auto-reload only in development. Always one worker: user keys live in this
+    # process's memory, so a second worker would not see keys saved through the first.
+    development = os.getenv('ENVIRONMENT', 'development') == 'development'
+    
     uvicorn.run(
         "api_server_user_keys:app",
         host="0.0.0.0",
         port=8000,
-        reload=True,
-        log_level="info"
+        loop="asyncio" if sys.platform == "win32" else "uvloop",
+        http="httptools",
+        reload=development,
+        workers=1,
+        log_level="info" if development else "warning",
+        access_log=development
     )
@@ -4,9 +4,22 @@ This module uses CrewAI's full capabilities to orchestrate all 11 agents
 """
 
 from crewai import Agent, Task, Crew, Process
-from typing import Dict, Any, List
+from chromadb.api.types import Documents, EmbeddingFunction
+from typing import Dict, Any, List, Optional, Callable, Tuple, Awaitable, AsyncIterator
+from collections import OrderedDict
+from collections.abc import Mapping
 from datetime import datetime
+import asyncio
+import copy
+import functools
+import hashlib
+import json
+import math
 import os
+import re
+import threading
+import time
+import weakref
 
 # Import all our agents
 from agents.clarification_agent import create_clarification_agent
@@ -22,363 +35,807 @@ from agents.hosting_assistant import create_hosting_assistant
 from agents.monitoring_engineer import create_monitoring_engineer
 from agents.llm_config import get_configured_llm
 
-class CrewBuilderOrchestrator:
-    """Orchestrates all 11 agents using CrewAI's hierarchical process"""
+# The hierarchical manager only routes work between agents, so a small, low-temperature
+# model is enough; the agents that write code and docs keep their own models
+_MANAGER_MODEL = os.environ.get("CREWBUILDER_MANAGER_MODEL", "gpt-4o-mini")
+_MANAGER_TEMPERATURE = 0.3
+
+# Every agent, the manager and the memory embeddings call OpenAI
+_REQUIRED_ENV_VARS = ("OPENAI_API_KEY",)
+
+# Embedding model used for crew memory (and the build cache)
+_EMBEDDING_MODEL = "text-embedding-ada-002"
+
+
+class CachedEmbeddingFunction(EmbeddingFunction[Documents]):
+    """
+    Chroma embedding function that memoizes OpenAI embeddings by SHA-256 of the text
     
-    def __init__(self):
-        """Initialize all agents and the orchestration manager"""
-        print("🚀 Initializing CrewBuilder Orchestrator...")
-        
-        # Create the manager LLM for hierarchical orchestration
-        self.manager_llm = get_configured_llm(model="gpt-4", temperature=0.7)
-        
-        # Initialize all agents
-        self.agents = {
-            'clarification': create_clarification_agent(),
-            'requirements': create_requirements_analyst(),
-            'architect': create_system_architect(),
-            'code_generator': create_code_generator(),
-            'qa': create_quality_assurance_agent(),
-            'api_detective': create_api_detective(),
-            'documentation': create_documentation_specialist(),
-            'infrastructure': create_infrastructure_analyst(),
-            'deployment': create_deployment_engineer(),
-            'hosting': create_hosting_assistant(),
-            'monitoring': create_monitoring_engineer()
-        }
+    Agent backstories and task descriptions are re-embedded by crew memory on
+    every build; with this only new text reaches the embeddings API. Editing a
+    text changes its hash, so stale vectors are never reused.
+    
+    It must subclass chromadb's EmbeddingFunction: CrewAI's custom embedder
+    configuration uses an instance as-is only when it passes that isinstance
+    check, and otherwise treats it as a factory and calls it with no arguments.
+    """
+    
+    def __init__(self, model: str, max_entries: int = 4096):
+        self.model = model
+        self.max_entries = max_entries
+        self._embed = None
+        self._vectors = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def __call__(self, input: Documents) -> List[List[float]]:
+        keys = [hashlib.sha256(text.encode()).hexdigest() for text in input]
+        with self._lock:
+            vectors = [self._vectors.get(key) for key in keys]
         
-        print(f"✅ Initialized {len(self.agents)} agents")
+        missing = [i for i, vector in enumerate(vectors) if vector is None]
+        if missing:
+            if self._embed is None:
+                from chromadb.utils.embedding_functions import OpenAIEmbeddingFunction
+                self._embed = OpenAIEmbeddingFunction(api_key=os.getenv("OPENAI_API_KEY"), model_name=self.model)
+            fresh = self._embed([input[i] for i in missing])
+            with self._lock:
+                for i, vector in zip(missing, fresh):
+                    vectors[i] = self._vectors[keys[i]] = list(vector)
+                while len(self._vectors) > self.max_entries:
+                    self._vectors.popitem(last=False)
+        return vectors
+
+
+_embedding_function = CachedEmbeddingFunction(_EMBEDDING_MODEL)
+
+_EMBEDDER_CONFIG = {
+    "provider": "custom",
+    "config": {
+        "embedder": _embedding_function
+    }
+}
+
+# Artifact extraction from the code generator's output
+# Lines after the first "requirements" line (skipping an opening code fence) up to the next fence
+_REQUIREMENTS_BLOCK_RE = re.compile(
+    r"requirements[^\n]*\n(?:[ \t]*```[^\n]*\n)?((?:(?![ \t]*```)[^\n]*(?:\n|$))+)",
+    re.IGNORECASE
+)
+# One requirement specifier per line: name[extras] with optional version clauses,
+# environment marker and trailing comment
+_REQUIREMENT_LINE_RE = re.compile(
+    r"^[ \t]*([A-Za-z0-9][A-Za-z0-9._-]*(?:\[[A-Za-z0-9._, -]*\])?"
+    r"(?:[ \t]*(?:===|[=<>!~]=?)[ \t]*[^\s#;,]+(?:[ \t]*,[ \t]*(?:===|[=<>!~]=?)[ \t]*[^\s#;,]+)*)?"
+    r"(?:[ \t]*;[^#\n]*)?)[ \t]*(?:#[^\n]*)?$",
+    re.MULTILINE
+)
+
+
+# Task descriptions keep their static instructions first and any per-request
+# input last, so the prompt prefix is byte-identical across builds and hits the
+# provider's automatic prompt cache. Only the requirements task has dynamic input.
+_REQUIREMENTS_TMPL = """
+Analyze the business requirement below and create a detailed technical specification.
+
+Focus on:
+1. Understanding the core business problem
+2. Identifying all necessary agent roles
+3. Mapping out the workflow
+4. Listing required integrations
+5. Estimating complexity
+
+Be specific and thorough.
+
+## Input
+Original requirement: {user_requirement}
+{clarified_details}
+"""
+
+_ARCHITECTURE_DESC = """
+Design the complete CrewAI architecture based on the requirements analysis.
+
+Create:
+1. Detailed agent definitions (name, role, goal, backstory, tools)
+2. Task definitions with clear dependencies
+3. Workflow structure (sequential or hierarchical)
+4. Integration points and data flow
+5. Error handling strategy
+
+Ensure the architecture is production-ready and scalable.
+"""
+
+_API_DISCOVERY_DESC = """
+Research and document all APIs needed for this system.
+
+For each integration mentioned:
+1. Find the official API documentation
+2. Identify authentication methods
+3. List relevant endpoints
+4. Note rate limits and costs
+5. Provide code examples
+
+If no API exists, suggest alternatives.
+"""
+
+_CODE_GENERATION_DESC = """
+Generate production-ready CrewAI code based on the architecture.
+
+Include:
+1. Complete main.py with all agents and tasks
+2. Proper error handling and logging
+3. Configuration management
+4. Requirements.txt with versions
+5. Environment variable handling
+
+Code must be immediately runnable.
+"""
+
+_QA_DESC = """
+Validate the generated code for quality and completeness.
+
+Check:
+1. Code syntax and structure
+2. Error handling coverage
+3. Security best practices
+4. Performance considerations
+5. Test coverage recommendations
+
+Provide specific improvements if needed.
+"""
+
+_DOCUMENTATION_DESC = """
+Create comprehensive documentation for the system.
+
+Include:
+1. README with setup instructions
+2. API documentation
+3. Configuration guide
+4. Troubleshooting section
+5. Examples and use cases
+
+Make it user-friendly and complete.
+"""
+
+_INFRASTRUCTURE_DESC = """
+Analyze infrastructure requirements and provide recommendations.
+
+Consider:
+1. Compute requirements
+2. Storage needs
+3. Networking configuration
+4. Security requirements
+5. Cost optimization
+
+Recommend specific services and configurations.
+"""
+
+_DEPLOYMENT_DESC = """
+Create deployment configurations and automation.
+
+Provide:
+1. Dockerfile or deployment scripts
+2. CI/CD pipeline configuration
+3. Environment setup
+4. Secrets management
+5. Rollback procedures
+
+Focus on Railway deployment.
+"""
+
+_HOSTING_DESC = """
+Configure hosting and provide setup instructions.
+
+Include:
+1. Railway project setup
+2. Environment variable configuration
+3. Domain setup (if needed)
+4. SSL configuration
+5. Backup strategy
+
+Make it step-by-step clear.
+"""
+
+_MONITORING_DESC = """
+Set up monitoring and observability.
+
+Configure:
+1. Logging strategy
+2. Error tracking
+3. Performance monitoring
+4. Alerts and notifications
+5. Dashboard setup
+
+Ensure production readiness.
+"""
+
+# (agent key, description, expected output, indices of context tasks) for
+# tasks 2-10; indices refer to the task list, with the requirements task at 0
+_TASK_SPECS = (
+    # Task 2: System Architecture (depends on requirements)
+    ('architect', _ARCHITECTURE_DESC, "Complete CrewAI architecture with agents, tasks, and workflow", (0,)),
+    # Task 3: API Discovery (can run parallel to architecture)
+    ('api_detective', _API_DISCOVERY_DESC, "Comprehensive API integration guide with examples", (0,)),
+    # Task 4: Code Generation (depends on architecture and APIs)
+    ('code_generator', _CODE_GENERATION_DESC, "Complete, production-ready CrewAI implementation", (1, 2)),
+    # Task 5: Quality Assurance (depends on code)
+    ('qa', _QA_DESC, "QA report with validation results and improvements", (3,)),
+    # Task 6: Documentation (depends on code and QA)
+    ('documentation', _DOCUMENTATION_DESC, "Complete documentation package", (3, 4)),
+    # Task 7: Infrastructure Analysis (can run parallel to docs)
+    ('infrastructure', _INFRASTRUCTURE_DESC, "Infrastructure recommendations with cost estimates", (1, 3)),
+    # Task 8: Deployment Configuration (depends on infra)
+    ('deployment', _DEPLOYMENT_DESC, "Complete deployment configuration", (6, 3)),
+    # Task 9: Hosting Setup (depends on deployment)
+    ('hosting', _HOSTING_DESC, "Hosting setup guide", (7,)),
+    # Task 10: Monitoring Setup (final task)
+    ('monitoring', _MONITORING_DESC, "Monitoring configuration and setup guide", (7, 8))
+)
+
+
+# Result keys for the tasks from create_generation_tasks, in creation order
+TASK_NAMES = (
+    'requirements_analysis',
+    'system_architecture',
+    'api_discovery',
+    'code_generation',
+    'quality_assurance',
+    'documentation',
+    'infrastructure_analysis',
+    'deployment_config',
+    'hosting_setup',
+    'monitoring_setup'
+)
+
+
+def _pack_task_output(task: Task) -> Dict[str, Any]:
+    """Result entry for one executed task (CrewAI stores its output in task.output)"""
+    output = task.output
+    return {
+        'completed': output is not None,
+        'output': str(output) if output is not None else None,
+        'agent': task.agent.role
+    }
+
+
+def _openai_embedding(text: str) -> List[float]:
+    """Embed text with the same (cached) embedding function the crews use for memory"""
+    return _embedding_function([text])[0]
+
+
+@functools.lru_cache(maxsize=4)
+def _get_manager_llm(model: str, temperature: float):
+    """Manager LLM shared by all orchestrators, so its HTTP connection pool is reused"""
+    return get_configured_llm(model=model, temperature=temperature)
+
+
+class LLMCache:
+    """
+    In-memory cache of build results for repeated and near-duplicate requirements
+    
+    Exact repeats are found by SHA-256 of the normalized request text. Only with
+    semantic=True is anything else compared by cosine similarity of its embedding
+    against stored entries: ada-002 scores even unrelated texts around 0.9, so a
+    near-duplicate match can serve a build made for a different requirement (or
+    user), and it is left to callers that accept that. Entries expire after ttl
+    seconds and the least recently used entry is evicted beyond max_entries.
+    """
     
-    def create_generation_tasks(self, user_requirement: str, clarified_requirements: Dict[str, Any] = None) -> List[Task]:
-        """Create all tasks with proper dependencies"""
+    def __init__(self, ttl: float = 3600, threshold: float = 0.98, max_entries: int = 256,
+                 embed: Callable[[str], List[float]] = _openai_embedding, semantic: bool = False):
+        self.ttl = ttl
+        self.semantic = semantic
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.embed = embed
+        self.stats = {"hits": 0, "misses": 0}
+        # key -> (expires_at, embedding, embedding_norm, results); guarded by _lock
+        # since async builds look up and store from worker threads
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+    
+    @staticmethod
+    def cache_text(user_requirement: str, clarified_requirements: Dict[str, Any] = None) -> str:
+        """Normalized text a build is cached under"""
+        text = " ".join(user_requirement.lower().split())
+        if clarified_requirements:
+            text += "\n" + json.dumps(clarified_requirements, sort_keys=True, default=str)
+        return text
+    
+    @staticmethod
+    def cache_key(text: str) -> str:
+        """Deterministic key for exact matches"""
+        return hashlib.sha256(text.encode()).hexdigest()
+    
+    def lookup(self, text: str) -> Tuple[Optional[Dict[str, Any]], str, Optional[List[float]]]:
+        """
+        Find cached results for text. Returns (results or None, key, embedding);
+        pass key and embedding back to store() on a miss to avoid re-embedding.
+        """
+        key = self.cache_key(text)
+        with self._lock:
+            now = time.monotonic()
+            for expired in [k for k, entry in self._entries.items() if entry[0] <= now]:
+                del self._entries[expired]
+            
+            entry = self._entries.get(key)
+            if entry is not None:
+                return self._hit(key, entry), key, entry[1]
+            compare = self.semantic and bool(self._entries)
         
-        tasks = []
+        embedding = None
+        if compare:
+            try:
+                embedding = self.embed(text)
+            except Exception as e:
+                print(f"Warning: Could not embed requirement for cache lookup: {e}")
         
-        # Task 1: Requirements Analysis
-        requirements_task = Task(
-            description=f"""
-            Analyze this business requirement and create a detailed technical specification:
-            
-            Original requirement: {user_requirement}
-            {f"Clarified details: {clarified_requirements}" if clarified_requirements else ""}
+        with self._lock:
+            if embedding is not None:
+                norm = math.sqrt(sum(x * x for x in embedding)) or 1.0
+                best_key, best_score = None, self.threshold
+                for other_key, other in self._entries.items():
+                    dot = sum(a * b for a, b in zip(embedding, other[1]))
+                    score = dot / (norm * other[2])
+                    if score >= best_score:
+                        best_key, best_score = other_key, score
+                if best_key is not None:
+                    return self._hit(best_key, self._entries[best_key]), key, embedding
             
-            Focus on:
-            1. Understanding the core business problem
-            2. Identifying all necessary agent roles
-            3. Mapping out the workflow
-            4. Listing required integrations
-            5. Estimating complexity
-            
-            Be specific and thorough.
-            """,
-            agent=self.agents['requirements'],
-            expected_output="Detailed technical specification with agent roles and workflow"
-        )
-        tasks.append(requirements_task)
+            self.stats["misses"] += 1
+        return None, key, embedding
+    
+    def store(self, key: str, embedding: Optional[List[float]], results: Dict[str, Any], text: str = None) -> None:
+        """Cache results under key (for semantic caches the embedding is computed from text if not given)"""
+        if embedding is None and text is not None and self.semantic:
+            try:
+                embedding = self.embed(text)
+            except Exception as e:
+                print(f"Warning: Could not embed requirement for cache: {e}")
+        if embedding is None:
+            embedding = []
+        norm = math.sqrt(sum(x * x for x in embedding)) or 1.0
+        entry = (time.monotonic() + self.ttl, embedding, norm, copy.deepcopy(results))
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            if len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+    
+    def _hit(self, key: str, entry: tuple) -> Dict[str, Any]:
+        """Record a hit on entry (caller holds the lock) and return a copy of its results"""
+        self._entries.move_to_end(key)
+        self.stats["hits"] += 1
+        return copy.deepcopy(entry[3])
+
+class BatchProcessor:
+    """Run coroutines with bounded concurrency and an optional starts-per-second cap"""
+    
+    def __init__(self, max_concurrency: int = 5, rate_limit: Optional[float] = None):
+        self.max_concurrency = max_concurrency
+        self.rate_limit = rate_limit
+        self._next_start = 0.0
+        # One semaphore per event loop, since sync wrappers each start a fresh loop
+        self._semaphores = weakref.WeakKeyDictionary()
+    
+    async def run(self, jobs: List[Callable[[], Awaitable[Any]]]) -> List[Any]:
+        """Await every job (a zero-argument coroutine function), returning results in order"""
+        loop = asyncio.get_running_loop()
+        semaphore = self._semaphores.get(loop)
+        if semaphore is None:
+            semaphore = self._semaphores[loop] = asyncio.Semaphore(self.max_concurrency)
         
-        # Task 2: System Architecture (depends on requirements)
-        architecture_task = Task(
-            description="""
-            Design the complete CrewAI architecture based on the requirements analysis.
-            
-            Create:
-            1. Detailed agent definitions (name, role, goal, backstory, tools)
-            2. Task definitions with clear dependencies
-            3. Workflow structure (sequential or hierarchical)
-            4. Integration points and data flow
-            5. Error handling strategy
-            
-            Ensure the architecture is production-ready and scalable.
-            """,
-            agent=self.agents['architect'],
-            expected_output="Complete CrewAI architecture with agents, tasks, and workflow",
-            context=[requirements_task]  # Depends on requirements
-        )
-        tasks.append(architecture_task)
+        async def run_job(job):
+            async with semaphore:
+                if self.rate_limit:
+                    now = time.monotonic()
+                    start = max(now, self._next_start)
+                    self._next_start = start + 1.0 / self.rate_limit
+                    if start > now:
+                        await asyncio.sleep(start - now)
+                return await job()
         
-        # Task 3: API Discovery (can run parallel to architecture)
-        api_task = Task(
-            description="""
-            Research and document all APIs needed for this system.
-            
-            For each integration mentioned:
-            1. Find the official API documentation
-            2. Identify authentication methods
-            3. List relevant endpoints
-            4. Note rate limits and costs
-            5. Provide code examples
-            
-            If no API exists, suggest alternatives.
-            """,
-            agent=self.agents['api_detective'],
-            expected_output="Comprehensive API integration guide with examples",
-            context=[requirements_task]
-        )
-        tasks.append(api_task)
+        return await asyncio.gather(*(run_job(job) for job in jobs))
+
+
+class LazyAgents(Mapping):
+    """Read-only mapping of agent name -> Agent that creates each agent on first access"""
+    
+    def __init__(self, factories: Dict[str, Callable[[], Agent]]):
+        self._factories = factories
+        self._agents = {}
+        self._lock = threading.Lock()
+    
+    def __getitem__(self, name: str) -> Agent:
+        agent = self._agents.get(name)
+        if agent is None:
+            factory = self._factories[name]
+            with self._lock:
+                agent = self._agents.get(name)
+                if agent is None:
+                    agent = self._agents[name] = factory()
+        return agent
+    
+    def __iter__(self):
+        return iter(self._factories)
+    
+    def __len__(self) -> int:
+        return len(self._factories)
+
+
+# Factory for every agent, by the key tasks and clarification look it up under
+_AGENT_FACTORIES = {
+    'clarification': create_clarification_agent,
+    'requirements': create_requirements_analyst,
+    'architect': create_system_architect,
+    'code_generator': create_code_generator,
+    'qa': create_quality_assurance_agent,
+    'api_detective': create_api_detective,
+    'documentation': create_documentation_specialist,
+    'infrastructure': create_infrastructure_analyst,
+    'deployment': create_deployment_engineer,
+    'hosting': create_hosting_assistant,
+    'monitoring': create_monitoring_engineer
+}
+
+
+def _require_no_running_loop(async_name: str) -> None:
+    """Blocking wrappers use asyncio.run, which cannot start inside a running event loop"""
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return
+    raise RuntimeError(f"Called from a running event loop; await {async_name}() instead")
+
+
+class CrewBuilderOrchestrator:
+    """Orchestrates all 11 agents, running independent tasks concurrently"""
+    
+    def __init__(self, semantic_cache: bool = False):
+        """
+        Register all agents and the orchestration manager (both created on first use)
         
-        # Task 4: Code Generation (depends on architecture and APIs)
-        code_task = Task(
-            description="""
-            Generate production-ready CrewAI code based on the architecture.
-            
-            Include:
-            1. Complete main.py with all agents and tasks
-            2. Proper error handling and logging
-            3. Configuration management
-            4. Requirements.txt with versions
-            5. Environment variable handling
-            
-            Code must be immediately runnable.
-            """,
-            agent=self.agents['code_generator'],
-            expected_output="Complete, production-ready CrewAI implementation",
-            context=[architecture_task, api_task]  # Depends on both
-        )
-        tasks.append(code_task)
+        Builds are cached for exact repeats of a requirement; semantic_cache=True
+        also serves near-identical ones (see LLMCache), which is only safe when
+        the orchestrator is not shared between users.
+        """
+        self._validate_env()
         
-        # Task 5: Quality Assurance (depends on code)
-        qa_task = Task(
-            description="""
-            Validate the generated code for quality and completeness.
-            
-            Check:
-            1. Code syntax and structure
-            2. Error handling coverage
-            3. Security best practices
-            4. Performance considerations
-            5. Test coverage recommendations
-            
-            Provide specific improvements if needed.
-            """,
-            agent=self.agents['qa'],
-            expected_output="QA report with validation results and improvements",
-            context=[code_task]
-        )
-        tasks.append(qa_task)
+        print("🚀 Initializing CrewBuilder Orchestrator...")
         
-        # Task 6: Documentation (depends on code and QA)
-        docs_task = Task(
-            description="""
-            Create comprehensive documentation for the system.
-            
-            Include:
-            1. README with setup instructions
-            2. API documentation
-            3. Configuration guide
-            4. Troubleshooting section
-            5. Examples and use cases
-            
-            Make it user-friendly and complete.
-            """,
-            agent=self.agents['documentation'],
-            expected_output="Complete documentation package",
-            context=[code_task, qa_task]
-        )
-        tasks.append(docs_task)
+        # Agent registry for callers; each build and clarification run creates its
+        # own agents, since CrewAI keeps per-run state (the agent executor, the
+        # crew back-reference) on Agent objects and concurrent runs must not share them
+        self.agents = LazyAgents(_AGENT_FACTORIES)
         
-        # Task 7: Infrastructure Analysis (can run parallel to docs)
-        infra_task = Task(
-            description="""
-            Analyze infrastructure requirements and provide recommendations.
-            
-            Consider:
-            1. Compute requirements
-            2. Storage needs
-            3. Networking configuration
-            4. Security requirements
-            5. Cost optimization
-            
-            Recommend specific services and configurations.
-            """,
-            agent=self.agents['infrastructure'],
-            expected_output="Infrastructure recommendations with cost estimates",
-            context=[architecture_task, code_task]
-        )
-        tasks.append(infra_task)
+        print(f"✅ Registered {len(self.agents)} agents")
         
-        # Task 8: Deployment Configuration (depends on infra)
-        deploy_task = Task(
-            description="""
-            Create deployment configurations and automation.
-            
-            Provide:
-            1. Dockerfile or deployment scripts
-            2. CI/CD pipeline configuration
-            3. Environment setup
-            4. Secrets management
-            5. Rollback procedures
-            
-            Focus on Railway deployment.
-            """,
-            agent=self.agents['deployment'],
-            expected_output="Complete deployment configuration",
-            context=[infra_task, code_task]
-        )
-        tasks.append(deploy_task)
+        # Build results for repeated / near-identical requirements
+        self.llm_cache = LLMCache(semantic=semantic_cache)
+        self.stats = self.llm_cache.stats
         
-        # Task 9: Hosting Setup (depends on deployment)
-        hosting_task = Task(
-            description="""
-            Configure hosting and provide setup instructions.
-            
-            Include:
-            1. Railway project setup
-            2. Environment variable configuration
-            3. Domain setup (if needed)
-            4. SSL configuration
-            5. Backup strategy
-            
-            Make it step-by-step clear.
-            """,
-            agent=self.agents['hosting'],
-            expected_output="Hosting setup guide",
-            context=[deploy_task]
-        )
-        tasks.append(hosting_task)
+        # Bounds concurrent real-time crews so wide levels and batch builds don't hit rate limits
+        self.batch_processor = BatchProcessor(max_concurrency=5)
+    
+    @staticmethod
+    def _validate_env() -> None:
+        """Fail at construction, not deep inside a kickoff, when API keys are missing"""
+        missing = [name for name in _REQUIRED_ENV_VARS if not os.getenv(name, '').strip()]
+        if missing:
+            raise ValueError(f"{', '.join(missing)} is required for CrewBuilder to function")
+    
+    @property
+    def manager_llm(self):
+        """Manager LLM for hierarchical orchestration, created on first hierarchical build"""
+        return _get_manager_llm(_MANAGER_MODEL, _MANAGER_TEMPERATURE)
+    
+    def create_generation_tasks(self, user_requirement: str, clarified_requirements: Dict[str, Any] = None,
+                                agents: Optional[Mapping] = None) -> List[Task]:
+        """Create all tasks with proper dependencies (assigned to a fresh agent set unless agents is given)"""
+        if agents is None:
+            agents = LazyAgents(_AGENT_FACTORIES)
         
-        # Task 10: Monitoring Setup (final task)
-        monitoring_task = Task(
-            description="""
-            Set up monitoring and observability.
-            
-            Configure:
-            1. Logging strategy
-            2. Error tracking
-            3. Performance monitoring
-            4. Alerts and notifications
-            5. Dashboard setup
-            
-            Ensure production readiness.
-            """,
-            agent=self.agents['monitoring'],
-            expected_output="Monitoring configuration and setup guide",
-            context=[deploy_task, hosting_task]
-        )
-        tasks.append(monitoring_task)
+        # Task 1: Requirements Analysis
+        tasks = [Task(
+            description=_REQUIREMENTS_TMPL.format_map({
+                'user_requirement': user_requirement,
+                'clarified_details': f"Clarified details: {clarified_requirements}" if clarified_requirements else ""
+            }),
+            agent=agents['requirements'],
+            expected_output="Detailed technical specification with agent roles and workflow"
+        )]
+        
+        # Tasks 2-10 depend on earlier tasks through their context
+        for agent_key, description, expected_output, depends_on in _TASK_SPECS:
+            tasks.append(Task(
+                description=description,
+                agent=agents[agent_key],
+                expected_output=expected_output,
+                context=[tasks[i] for i in depends_on]
+            ))
         
         return tasks
     
-    def build_crew_system(self, user_requirement: str, clarified_requirements: Dict[str, Any] = None) -> Dict[str, Any]:
+    def build_crew_system(self, user_requirement: str, clarified_requirements: Dict[str, Any] = None,
+                          parallel: bool = True, use_cache: bool = True, batch_mode: bool = False) -> Dict[str, Any]:
         """
         Main orchestration method - builds complete system using CrewAI
+        
+        Blocking wrapper around build_crew_system_async; raises RuntimeError when
+        called from a running event loop, where the async variant must be awaited.
+        """
+        _require_no_running_loop("build_crew_system_async")
+        return asyncio.run(self.build_crew_system_async(
+            user_requirement, clarified_requirements,
+            parallel=parallel, use_cache=use_cache, batch_mode=batch_mode
+        ))
+    
+    async def build_many(self, user_requirements: List[str]) -> List[Dict[str, Any]]:
+        """Build systems for several requirements concurrently (each with its own agent set)"""
+        return await asyncio.gather(*(
+            self.build_crew_system_async(requirement)
+            for requirement in user_requirements
+        ))
+    
+    async def build_crew_system_async(self, user_requirement: str, clarified_requirements: Dict[str, Any] = None,
+                                      parallel: bool = True, use_cache: bool = True,
+                                      batch_mode: bool = False, agents: Optional[Mapping] = None) -> Dict[str, Any]:
+        """
+        Build a complete system using CrewAI without blocking the event loop
+        
+        With parallel=True (default) tasks run level by level through their
+        context dependencies, siblings concurrently; parallel=False hands the
+        whole pipeline to a hierarchical crew with the manager LLM instead.
+        batch_mode=True submits each level to the OpenAI Batch API at half the
+        cost, for non-interactive builds that can wait for batch turnaround.
+        Results of earlier builds for the same requirement (or a near-identical
+        one, with semantic_cache) are returned from the cache, marked
+        cached=True, unless use_cache=False. Tasks run on a fresh agent set
+        unless one is given, so concurrent builds never share Agent objects.
         """
         print("\n🎯 Starting CrewBuilder Orchestration")
         print(f"📋 Requirement: {user_requirement[:100]}...")
         
+        if use_cache:
+            cache_text = LLMCache.cache_text(user_requirement, clarified_requirements)
+            # Lookups may call the embeddings API, so keep them off the event loop
+            cached, cache_key, embedding = await asyncio.to_thread(self.llm_cache.lookup, cache_text)
+            if cached is not None:
+                print("\n⚡ Returning cached build for this requirement")
+                # generated_at and execution_time describe the original build
+                cached['cached'] = True
+                return cached
+        
         # Create all tasks with dependencies
-        tasks = self.create_generation_tasks(user_requirement, clarified_requirements)
+        tasks = self.create_generation_tasks(user_requirement, clarified_requirements, agents)
         
-        # Get all agents for the crew (excluding clarification as it runs separately)
-        crew_agents = [
-            self.agents['requirements'],
-            self.agents['architect'],
-            self.agents['api_detective'],
-            self.agents['code_generator'],
-            self.agents['qa'],
-            self.agents['documentation'],
-            self.agents['infrastructure'],
-            self.agents['deployment'],
-            self.agents['hosting'],
-            self.agents['monitoring']
-        ]
-        
-        # Create the crew with hierarchical process
-        print("\n🏗️ Creating CrewAI Crew with hierarchical orchestration...")
-        crew = Crew(
-            agents=crew_agents,
-            tasks=tasks,
-            process=Process.hierarchical,  # Manager coordinates all agents
-            manager_llm=self.manager_llm,   # GPT-4 manages the crew
-            verbose=True,
-            memory=True,  # Enable memory sharing between agents
-            embedder={
-                "provider": "openai",
-                "config": {
-                    "model": "text-embedding-ada-002"
-                }
-            }
-        )
+        embedder = _EMBEDDER_CONFIG
         
         # Execute the crew
         print("\n🚀 Executing CrewAI pipeline...")
         start_time = datetime.now()
         
         try:
-            # Kickoff returns the final task's output
-            result = crew.kickoff()
+            if batch_mode:
+                result = await self._run_levels_as_batches(tasks)
+            elif parallel:
+                # Kickoff of the last level returns the final task's output
+                result = await self._kickoff_by_level(tasks, embedder)
+            else:
+                result = await self._kickoff_hierarchical(tasks, embedder)
             
             execution_time = (datetime.now() - start_time).total_seconds()
             print(f"\n✅ Pipeline completed in {execution_time:.1f} seconds")
             
             # Process results from all tasks
-            return self._process_crew_results(result, tasks, execution_time)
+            results = self._process_crew_results(result, tasks, execution_time)
+            if use_cache:
+                await asyncio.to_thread(self.llm_cache.store, cache_key, embedding, results, cache_text)
+            return results
             
         except Exception as e:
             print(f"\n❌ Crew execution failed: {str(e)}")
             raise
     
+    async def stream_build(self, user_requirement: str, clarified_requirements: Dict[str, Any] = None,
+                           parallel: bool = True) -> AsyncIterator[Tuple[str, str]]:
+        """
+        Yield (task_name, output) pairs as each generation task completes
+        
+        Lets callers render or save results while later tasks are still
+        running instead of waiting on the whole pipeline. Streaming builds
+        bypass the build cache and do not support batch mode.
+        """
+        tasks = self.create_generation_tasks(user_requirement, clarified_requirements)
+        
+        # CrewAI calls task callbacks from its worker threads
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue()
+        
+        def on_complete(name: str) -> Callable[[Any], None]:
+            return lambda output: loop.call_soon_threadsafe(queue.put_nowait, (name, str(output)))
+        
+        for name, task in zip(TASK_NAMES, tasks):
+            task.callback = on_complete(name)
+        
+        if parallel:
+            run = asyncio.ensure_future(self._kickoff_by_level(tasks, _EMBEDDER_CONFIG))
+        else:
+            run = asyncio.ensure_future(self._kickoff_hierarchical(tasks, _EMBEDDER_CONFIG))
+        # Callbacks are queued before the kickoff returns, so None always arrives last
+        run.add_done_callback(lambda _: queue.put_nowait(None))
+        
+        try:
+            while (item := await queue.get()) is not None:
+                yield item
+            run.result()  # Surface crew failures to the caller
+        finally:
+            if not run.done():
+                run.cancel()
+    
+    @staticmethod
+    def _task_levels(tasks: List[Task]) -> List[List[Task]]:
+        """
+        Group tasks into dependency levels: every task only depends (through its
+        context) on tasks in earlier levels. Tasks must come after their context.
+        """
+        level_of = {}
+        levels = []
+        for task in tasks:
+            context = task.context if isinstance(task.context, list) else []
+            level = max((level_of[id(dep)] + 1 for dep in context), default=0)
+            level_of[id(task)] = level
+            if level == len(levels):
+                levels.append([])
+            levels[level].append(task)
+        return levels
+    
+    async def _kickoff_by_level(self, tasks: List[Task], embedder: Dict[str, Any]) -> Any:
+        """Run each dependency level as concurrent single-task sequential crews"""
+        result = None
+        for level in self._task_levels(tasks):
+            print(f"\n🏗️ Running {len(level)} task(s) concurrently: "
+                  f"{', '.join(task.agent.role for task in level)}")
+            crews = [
+                Crew(
+                    agents=[task.agent],
+                    tasks=[task],
+                    process=Process.sequential,
+                    verbose=True,
+                    memory=True,  # Enable memory sharing between agents
+                    embedder=embedder
+                )
+                for task in level
+            ]
+            # LLM calls are network-bound, so sibling tasks overlap their round-trips
+            outputs = await self.batch_processor.run([crew.kickoff_async for crew in crews])
+            result = outputs[-1]
+        return result
+    
+    @staticmethod
+    def _batch_request(custom_id: str, task: Task) -> Dict[str, Any]:
+        """Chat completion request for one task, as a line of an OpenAI batch input file"""
+        agent = task.agent
+        llm = getattr(agent, 'llm', None)
+        model = getattr(llm, 'model', None) or getattr(llm, 'model_name', None) or "gpt-4"
+        prompt = f"{task.description}\n\nThis is the expected criteria for your final answer: {task.expected_output}"
+        context = task.context if isinstance(task.context, list) else []
+        if context:
+            prompt += "\n\nThis is the context you're working with:\n" + "\n\n".join(
+                str(dep.output) for dep in context
+            )
+        return {
+            "custom_id": custom_id,
+            "method": "POST",
+            "url": "/v1/chat/completions",
+            "body": {
+                "model": model,
+                "messages": [
+                    {"role": "system", "content": f"You are {agent.role}. {agent.backstory}\nYour personal goal is: {agent.goal}"},
+                    {"role": "user", "content": prompt}
+                ]
+            }
+        }
+    
+    async def _run_levels_as_batches(self, tasks: List[Task], poll_interval: float = 30.0) -> Any:
+        """Run each dependency level as one OpenAI Batch API job (upload -> poll -> collect)"""
+        from openai import AsyncOpenAI
+        from crewai.tasks.task_output import TaskOutput
+        
+        client = AsyncOpenAI()
+        result = None
+        for level_index, level in enumerate(self._task_levels(tasks)):
+            print(f"\n📦 Submitting batch for level {level_index}: "
+                  f"{', '.join(task.agent.role for task in level)}")
+            requests = [self._batch_request(f"task-{i}", task) for i, task in enumerate(level)]
+            batch_input = "\n".join(json.dumps(request) for request in requests).encode()
+            
+            batch_file = await client.files.create(file=("crewbuilder_batch.jsonl", batch_input), purpose="batch")
+            batch = await client.batches.create(
+                input_file_id=batch_file.id,
+                endpoint="/v1/chat/completions",
+                completion_window="24h"
+            )
+            while batch.status not in ("completed", "failed", "expired", "cancelled"):
+                await asyncio.sleep(poll_interval)
+                batch = await client.batches.retrieve(batch.id)
+            if batch.status != "completed" or not batch.output_file_id:
+                raise RuntimeError(f"Batch {batch.id} ended with status '{batch.status}'")
+            
+            content = await client.files.content(batch.output_file_id)
+            responses = {}
+            for line in content.text.splitlines():
+                if line.strip():
+                    item = json.loads(line)
+                    responses[item["custom_id"]] = item
+            
+            for i, task in enumerate(level):
+                item = responses.get(f"task-{i}")
+                response = (item or {}).get("response") or {}
+                if response.get("status_code") != 200:
+                    raise RuntimeError(f"Batch request for {task.agent.role} failed: {(item or {}).get('error')}")
+                raw = response["body"]["choices"][0]["message"]["content"]
+                task.output = TaskOutput(
+                    description=task.description,
+                    expected_output=task.expected_output,
+                    raw=raw,
+                    agent=task.agent.role
+                )
+                result = task.output
+        return result
+    
+    async def _kickoff_hierarchical(self, tasks: List[Task], embedder: Dict[str, Any]) -> Any:
+        """Run all tasks in one crew coordinated by the manager LLM"""
+        # Every task has its own agent (clarification runs separately), so the crew is
+        # made of the task agents, whichever agent set the tasks were created with
+        crew_agents = [task.agent for task in tasks]
+        
+        # Create the crew with hierarchical process
+        print("\n🏗️ Creating CrewAI Crew with hierarchical orchestration...")
+        crew = Crew(
+            agents=crew_agents,
+            tasks=tasks,
+            process=Process.hierarchical,  # Manager coordinates all agents
+            manager_llm=self.manager_llm,   # Manager LLM coordinates the crew
+            verbose=True,
+            memory=True,  # Enable memory sharing between agents
+            embedder=embedder
+        )
+        
+        # Kickoff returns the final task's output
+        return await crew.kickoff_async()
+    
     def _process_crew_results(self, final_result: Any, tasks: List[Task], execution_time: float) -> Dict[str, Any]:
         """Process and structure the results from all crew tasks"""
         
-        # CrewAI stores task outputs in task.output
+        # CrewAI stores task outputs in task.output. str() of a TaskOutput/CrewOutput
+        # without pydantic or JSON output returns its .raw string itself, so the
+        # strings below are shared references, not copies; final_output is the
+        # same object as the last task's output.
         results = {
             'success': True,
             'execution_time': execution_time,
             'generated_at': datetime.now().isoformat(),
             'tasks_completed': len(tasks),
             'final_output': str(final_result),
-            'task_outputs': {}
+            # Extract outputs from each task
+            'task_outputs': {name: _pack_task_output(task) for name, task in zip(TASK_NAMES, tasks)}
         }
         
-        # Extract outputs from each task
-        task_names = [
-            'requirements_analysis',
-            'system_architecture', 
-            'api_discovery',
-            'code_generation',
-            'quality_assurance',
-            'documentation',
-            'infrastructure_analysis',
-            'deployment_config',
-            'hosting_setup',
-            'monitoring_setup'
-        ]
-        
-        for i, (task, name) in enumerate(zip(tasks, task_names)):
-            try:
-                # Get task output (CrewAI stores it in task.output after execution)
-                output = getattr(task, 'output', None)
-                results['task_outputs'][name] = {
-                    'completed': output is not None,
-                    'output': str(output) if output else None,
-                    'agent': task.agent.role
-                }
-            except Exception as e:
-                print(f"Warning: Could not extract output for {name}: {e}")
-                results['task_outputs'][name] = {
-                    'completed': False,
-                    'error': str(e)
-                }
-        
         # Extract specific artifacts
         try:
             # Get generated code from code generation task
             code_output = results['task_outputs'].get('code_generation', {}).get('output', '')
+            # Plain substring tests stop at the first hit and are several times
+            # faster than a single regex alternation pass over the whole output
             if 'main.py' in code_output or 'import' in code_output:
                 results['generated_code'] = code_output
             
             # Get requirements.txt if present
             if 'requirements.txt' in code_output or 'pip install' in code_output:
-                # Extract requirements section
-                lines = code_output.split('\n')
-                req_start = False
-                requirements = []
-                for line in lines:
-                    if 'requirements' in line.lower():
-                        req_start = True
-                    elif req_start and line.strip() and not line.startswith('#'):
-                        requirements.append(line.strip())
-                results['requirements_txt'] = '\n'.join(requirements)
+                # Extract the requirement specifiers from the requirements section
+                block = _REQUIREMENTS_BLOCK_RE.search(code_output)
+                requirements = _REQUIREMENT_LINE_RE.findall(block.group(1)) if block else []
+                results['requirements_txt'] = '\n'.join(req.strip() for req in requirements)
             
             # Get architecture summary
             arch_output = results['task_outputs'].get('system_architecture', {}).get('output', '')
@@ -394,16 +851,22 @@ class CrewBuilderOrchestrator:
         return results
     
     def run_clarification(self, user_requirement: str) -> Dict[str, Any]:
-        """Run just the clarification agent separately"""
+        """Run just the clarification agent separately (blocking wrapper; use run_clarification_async inside an event loop)"""
+        _require_no_running_loop("run_clarification_async")
+        return asyncio.run(self.run_clarification_async(user_requirement))
+    
+    async def run_clarification_async(self, user_requirement: str) -> Dict[str, Any]:
+        """Run just the clarification agent separately without blocking the event loop"""
         print("\n💬 Running Clarification Agent...")
         
         # Import the clarification functions
         from agents.clarification_agent import analyze_initial_requirement
         
         try:
-            # Get clarification questions
-            questions = analyze_initial_requirement(
-                self.agents['clarification'],
+            # Get clarification questions (its crew kickoff blocks, so run it in a worker thread)
+            questions = await asyncio.to_thread(
+                analyze_initial_requirement,
+                _AGENT_FACTORIES['clarification'](),
                 user_requirement
             )
             
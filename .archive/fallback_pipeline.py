@@ -0,0 +1,517 @@
+#!/usr/bin/env python3
+"""
+CrewBuilder fallback pipeline - requirement analysis and crew design without API keys
+
+Kept apart from api_server_fallback so the server's pipeline worker processes
+only import this (pure, CPU-bound) code, not the web app, its logging setup or
+its log listener thread.
+"""
+
+import re
+import copy
+import functools
+import time
+import logging
+from typing import Dict, List, Any
+from datetime import datetime
+
+from agents.requirements_analyst import TechnicalSpecification
+from agents.system_architect import AgentSpecification, TaskSpecification, CrewWorkflow, CrewArchitecture
+
+logger = logging.getLogger("crewbuilder")
+
+# Keyword tables for fallback analysis
+# Category buckets are checked in order; the first one with a hit wins
+_CATEGORY_KEYWORDS = (
+    ("content_creation", frozenset({'content', 'blog', 'social', 'post', 'article'})),
+    ("system_integration", frozenset({'crm', 'sales', 'lead', 'customer'})),
+    ("data_analysis", frozenset({'data', 'analytics', 'report', 'dashboard'})),
+    ("system_development", frozenset({'meta', 'crewbuilder', 'agent', 'ai system'})),
+)
+
+_COMPLEXITY_KEYWORDS = {
+    'simple': frozenset({'simple', 'basic', 'one', 'single', 'automate'}),
+    'moderate': frozenset({'multiple', 'integrate', 'workflow', 'process', 'several'}),
+    'complex': frozenset({'enterprise', 'advanced', 'complex', 'machine learning', 'ai', 'scale', 'distributed', 'meta'}),
+}
+
+_API_KEYWORDS = (
+    (frozenset({'email'}), ('Gmail API', 'SendGrid API')),
+    (frozenset({'social'}), ('Twitter API', 'LinkedIn API', 'Facebook API')),
+    (frozenset({'wordpress', 'blog'}), ('WordPress API',)),
+    (frozenset({'analytics'}), ('Google Analytics API',)),
+    (frozenset({'crm'}), ('Salesforce API', 'HubSpot API')),
+    (frozenset({'slack'}), ('Slack API',)),
+)
+
+# Vocabulary for extract_system_name, in priority order
+_SYSTEM_NAME_DOMAINS = ('content', 'marketing', 'sales', 'customer', 'email', 'social', 'data', 'inventory', 'finance', 'hr')
+_SYSTEM_NAME_KEYWORDS = ('automate', 'automation', 'system', 'platform', 'solution', 'tool', 'assistant', 'bot')
+
+def _build_keyword_scanner(keywords):
+    """Compile keywords into one overlapping-match pattern plus prefix table"""
+    keywords = set(keywords)
+    
+    # Longest alternatives first so each position reports its longest keyword;
+    # every shorter keyword matching at that position is a prefix of it.
+    ordered = sorted(keywords, key=len, reverse=True)
+    pattern = re.compile("(?=(" + "|".join(re.escape(k) for k in ordered) + "))")
+    prefixes = {
+        keyword: frozenset(k for k in keywords if keyword.startswith(k))
+        for keyword in keywords
+    }
+    return pattern, prefixes
+
+_ANALYSIS_SCANNER = _build_keyword_scanner(
+    [keyword for _, group in _CATEGORY_KEYWORDS for keyword in group]
+    + [keyword for group in _COMPLEXITY_KEYWORDS.values() for keyword in group]
+    + [keyword for group, _ in _API_KEYWORDS for keyword in group]
+)
+
+_SYSTEM_NAME_SCANNER = _build_keyword_scanner(_SYSTEM_NAME_DOMAINS + _SYSTEM_NAME_KEYWORDS)
+
+def _scan_keywords(text_lower: str, scanner=_ANALYSIS_SCANNER) -> frozenset:
+    """Return every scanner keyword occurring in text_lower, in one pass"""
+    pattern, prefixes = scanner
+    hits = set()
+    for match in pattern.finditer(text_lower):
+        hits.update(prefixes[match.group(1)])
+    return frozenset(hits)
+
+# Fallback templates, shared across requests; the builders below copy them
+# into the List fields of the spec dataclasses, so callers may mutate those
+_ROLE_TEMPLATES = {
+    "content_creation": (
+        {"role": "content_researcher", "responsibility": "Research topics and trends"},
+        {"role": "content_generator", "responsibility": "Generate high-quality content"},
+        {"role": "seo_optimizer", "responsibility": "Optimize content for search engines"},
+        {"role": "publishing_manager", "responsibility": "Schedule and publish content"},
+        {"role": "performance_tracker", "responsibility": "Track content performance"}
+    ),
+    "system_integration": (
+        {"role": "integration_analyst", "responsibility": "Analyze system requirements"},
+        {"role": "data_connector", "responsibility": "Connect and sync data sources"},
+        {"role": "workflow_orchestrator", "responsibility": "Orchestrate business workflows"},
+        {"role": "validation_specialist", "responsibility": "Validate data integrity"},
+        {"role": "monitoring_agent", "responsibility": "Monitor system health"}
+    ),
+    "data_analysis": (
+        {"role": "data_collector", "responsibility": "Collect and aggregate data"},
+        {"role": "data_processor", "responsibility": "Process and clean data"},
+        {"role": "analytics_engine", "responsibility": "Perform data analysis"},
+        {"role": "report_generator", "responsibility": "Generate insights and reports"},
+        {"role": "visualization_specialist", "responsibility": "Create data visualizations"}
+    ),
+    "system_development": (
+        {"role": "requirements_analyst", "responsibility": "Analyze business requirements"},
+        {"role": "system_architect", "responsibility": "Design system architecture"},
+        {"role": "code_generator", "responsibility": "Generate production-ready code"},
+        {"role": "quality_assurance", "responsibility": "Validate system quality"},
+        {"role": "deployment_engineer", "responsibility": "Deploy and monitor system"}
+    )
+}
+
+_DEFAULT_ROLES = (
+    {"role": "data_processor", "responsibility": "Process input data"},
+    {"role": "task_executor", "responsibility": "Execute automation tasks"},
+    {"role": "output_formatter", "responsibility": "Format and deliver results"}
+)
+
+def _build_workflow_steps(category: str):
+    """Build the fallback workflow steps for a category"""
+    return (
+        {"step": "input_validation", "description": "Validate and prepare input data"},
+        {"step": "main_processing", "description": f"Execute {category.replace('_', ' ')} workflow"},
+        {"step": "quality_assurance", "description": "Check results and handle errors"},
+        {"step": "output_delivery", "description": "Format and deliver final results"}
+    )
+
+_WORKFLOW_STEPS = {
+    category: _build_workflow_steps(category)
+    for category in [label for label, _ in _CATEGORY_KEYWORDS] + ["process_automation"]
+}
+
+_CATEGORY_APIS = {
+    "content_creation": ("OpenAI API", "WordPress API", "Social Media APIs"),
+    "system_integration": ("REST APIs", "Database connectors", "Webhook APIs"),
+    "data_analysis": ("Data APIs", "Analytics APIs", "Visualization APIs"),
+    "system_development": ("OpenAI API", "GitHub API", "Cloud Platform APIs")
+}
+
+_DEFAULT_APIS = ("REST APIs", "Webhook APIs")
+
+_TOOL_MAPPING = {
+    'content_researcher': ('web_search', 'trend_analyzer', 'competitor_monitor'),
+    'content_generator': ('text_generator', 'template_engine', 'content_formatter'),
+    'seo_optimizer': ('keyword_analyzer', 'seo_checker', 'readability_analyzer'),
+    'publishing_manager': ('social_scheduler', 'cms_publisher', 'analytics_tracker'),
+    'requirements_analyst': ('requirement_parser', 'business_analyzer', 'specification_generator'),
+    'system_architect': ('architecture_designer', 'workflow_optimizer', 'resource_estimator'),
+    'code_generator': ('code_templates', 'syntax_validator', 'documentation_generator'),
+    'quality_assurance': ('test_generator', 'code_validator', 'performance_monitor'),
+    'deployment_engineer': ('deployment_automator', 'environment_manager', 'monitoring_setup')
+}
+
+_DEFAULT_TOOLS = ('basic_tools', 'file_handler', 'api_client')
+
+_RESOURCE_MAP = {
+    "simple": {"runtime": "5-15 minutes", "memory": "1GB", "cpu": "1 core"},
+    "moderate": {"runtime": "15-30 minutes", "memory": "2GB", "cpu": "2 cores"},
+    "complex": {"runtime": "30-60 minutes", "memory": "4GB", "cpu": "4 cores"}
+}
+
+_DATA_FLOWS = (
+    {"from": "input", "to": "processing", "type": "sequential"},
+    {"from": "processing", "to": "validation", "type": "sequential"},
+    {"from": "validation", "to": "output", "type": "sequential"}
+)
+
+_SUCCESS_METRICS = ("task_completion_rate", "output_quality", "execution_time", "user_satisfaction")
+
+# Last pipeline stage reported by every fallback response
+_FALLBACK_MODE_STAGE = {
+    'stage': 'Fallback Mode',
+    'status': 'completed',
+    'output': {
+        'note': 'Running in fallback mode without OpenAI API keys',
+        'recommendation': 'Add OpenAI API key for enhanced AI-powered analysis'
+    }
+}
+
+_AGENT_GOAL_TMPL = "Efficiently {resp_lower} with high quality and reliability"
+
+_BACKSTORY_TMPL = (
+    "You are a specialized AI agent expert in {role_words}. "
+    "You have extensive experience in {resp_lower} and work collaboratively "
+    "with other agents to achieve optimal business outcomes."
+)
+
+_TASK_DESCRIPTION_TMPL = "Execute {description}. Ensure high quality output and proper validation."
+
+_TASK_OUTPUT_TMPL = "Completed {step} with validated results and clear status report"
+
+_BASE_COSTS = {'simple': 25, 'moderate': 50, 'complex': 100}
+
+_COMPLEXITY_SCORES = {'simple': 1, 'moderate': 2, 'complex': 3}
+
+# No-API-Key Fallback Implementation
+def analyze_requirements(user_input: str) -> TechnicalSpecification:
+    """Analyze requirements using fallback logic only"""
+    
+    # Categorize based on keywords (single scan over all keyword buckets)
+    user_lower = user_input.lower()
+    keyword_hits = _scan_keywords(user_lower)
+    
+    category = next(
+        (label for label, keywords in _CATEGORY_KEYWORDS if not keywords.isdisjoint(keyword_hits)),
+        "process_automation"
+    )
+    
+    # Determine complexity
+    complexity_scores = {
+        level: len(keywords & keyword_hits)
+        for level, keywords in _COMPLEXITY_KEYWORDS.items()
+    }
+    
+    if len(user_input) > 500 or complexity_scores['complex'] > 0:
+        complexity = "complex"
+        estimated_agents = 5
+    elif len(user_input) > 200 or complexity_scores['moderate'] > 1:
+        complexity = "moderate"
+        estimated_agents = 4
+    else:
+        complexity = "simple"
+        estimated_agents = 3
+    
+    # Generate agent roles based on category
+    agent_roles = _get_fallback_agent_roles(category)
+    workflow_steps = _get_fallback_workflow_steps(category)
+    apis_required = _get_fallback_apis(keyword_hits, category)
+    
+    return TechnicalSpecification(
+        agent_roles_needed=[dict(role) for role in agent_roles[:estimated_agents]],
+        workflow_steps=[dict(step) for step in workflow_steps],
+        apis_required=apis_required,
+        data_flows=[dict(flow) for flow in _DATA_FLOWS],
+        complexity_estimate=complexity,
+        estimated_agents=estimated_agents
+    )
+
+def _get_fallback_agent_roles(category: str):
+    """Get fallback agent roles based on category"""
+    return _ROLE_TEMPLATES.get(category, _DEFAULT_ROLES)
+
+def _get_fallback_workflow_steps(category: str):
+    """Get fallback workflow steps based on category"""
+    return _WORKFLOW_STEPS[category]
+
+def _get_fallback_apis(keyword_hits: frozenset, category: str) -> List[str]:
+    """Suggest APIs based on keywords found in the input"""
+    apis = []
+    
+    # Common API suggestions based on keywords
+    for keywords, suggested in _API_KEYWORDS:
+        if not keywords.isdisjoint(keyword_hits):
+            apis.extend(suggested)
+    
+    # Category-based defaults
+    if not apis:
+        apis = list(_CATEGORY_APIS.get(category, _DEFAULT_APIS))
+    
+    return apis
+
+def design_crew_architecture(tech_spec: TechnicalSpecification, include_dependencies: bool = True) -> CrewArchitecture:
+    """Design crew architecture using fallback logic
+    
+    The fallback API response never reports dependencies, so it passes
+    include_dependencies=False; use crew_dependencies() to compute them later.
+    """
+    
+    # Generate agents
+    agents = []
+    for i, role_info in enumerate(tech_spec.agent_roles_needed):
+        role = role_info['role']
+        name, title, goal, backstory = _agent_texts(role, role_info['responsibility'])
+        
+        agent = AgentSpecification(
+            name=name,
+            role=title,
+            goal=goal,
+            backstory=backstory,
+            tools=list(_get_tools_for_role(role)),
+            max_iter=5,
+            memory=True,
+            verbose=True,
+            allow_delegation=False
+        )
+        agents.append(agent)
+    
+    # Generate tasks
+    tasks = []
+    for i, step_info in enumerate(tech_spec.workflow_steps):
+        name, description, expected_output = _task_texts(step_info['step'], step_info['description'])
+        agent_name = agents[i % len(agents)].name
+        
+        task = TaskSpecification(
+            name=name,
+            description=description,
+            agent_name=agent_name,
+            expected_output=expected_output,
+            depends_on=[tasks[i-1].name] if i > 0 else [],
+            output_format="structured_data"
+        )
+        tasks.append(task)
+    
+    # Generate workflow
+    workflow = CrewWorkflow(
+        name=f"{tech_spec.complexity_estimate}_automation_workflow",
+        description=f"Coordinated workflow for {tech_spec.complexity_estimate} business automation",
+        task_sequence=[task.name for task in tasks],
+        parallel_tasks=[],
+        decision_points=[]
+    )
+    
+    # Resource estimation
+    resources = _RESOURCE_MAP[tech_spec.complexity_estimate]
+    
+    return CrewArchitecture(
+        crew_name=f"{tech_spec.complexity_estimate}_automation_crew",
+        crew_description=f"AI-powered {tech_spec.complexity_estimate} automation crew with {len(agents)} specialized agents",
+        agents=agents,
+        tasks=tasks,
+        workflow=workflow,
+        estimated_runtime=resources["runtime"],
+        resource_requirements={"memory": resources["memory"], "cpu": resources["cpu"]},
+        success_metrics=list(_SUCCESS_METRICS),
+        dependencies=crew_dependencies(tech_spec) if include_dependencies else []
+    )
+
+def crew_dependencies(tech_spec: TechnicalSpecification):
+    """Packages/APIs a crew built from tech_spec depends on"""
+    return ["crewai", *tech_spec.apis_required]
+
+# Role and step vocabularies are small, so the generated texts are cached and
+# the same string objects are shared by every request
+@functools.lru_cache(maxsize=256)
+def _agent_texts(role: str, responsibility: str) -> tuple:
+    """Build (name, role title, goal, backstory) for a fallback agent"""
+    role_words = role.replace('_', ' ')
+    resp_lower = responsibility.lower()
+    return (
+        role + "_agent",
+        role_words.title(),
+        _AGENT_GOAL_TMPL.format(resp_lower=resp_lower),
+        _BACKSTORY_TMPL.format(role_words=role_words, resp_lower=resp_lower)
+    )
+
+@functools.lru_cache(maxsize=256)
+def _task_texts(step: str, description: str) -> tuple:
+    """Build (name, description, expected output) for a fallback task"""
+    return (
+        step + "_task",
+        _TASK_DESCRIPTION_TMPL.format(description=description),
+        _TASK_OUTPUT_TMPL.format(step=step)
+    )
+
+def _get_tools_for_role(role: str):
+    """Get appropriate tools for each role"""
+    return _TOOL_MAPPING.get(role, _DEFAULT_TOOLS)
+
+# Class wrappers kept for callers that instantiate the fallback agents
+class FallbackRequirementsAnalyst:
+    """Requirements analyst that works without API keys"""
+    __slots__ = ()
+    analyze_requirements = staticmethod(analyze_requirements)
+
+class FallbackSystemArchitect:
+    """System architect that works without API keys"""
+    __slots__ = ()
+    design_crew_architecture = staticmethod(design_crew_architecture)
+
+# Last (epoch second, ISO string) pair handed out by _iso_now
+_last_timestamp = (0, "")
+
+def _iso_now() -> str:
+    """Current local time in ISO format, cached at one-second resolution"""
+    global _last_timestamp
+    cached = _last_timestamp
+    now = int(time.time())
+    if now != cached[0]:
+        cached = (now, datetime.fromtimestamp(now).isoformat())
+        _last_timestamp = cached
+    return cached[1]
+
+# Requirements at or above this length are not memoized, to bound cache memory
+_CACHEABLE_REQUIREMENT_LENGTH = 8192
+
+def run_fallback_pipeline(requirement: str) -> Dict[str, Any]:
+    """Run a simplified pipeline using fallback logic only"""
+    
+    try:
+        logger.info("Running fallback pipeline for: %s...", requirement[:100])
+        
+        # The pipeline is deterministic in the requirement, so repeated
+        # requests reuse a cached result and only refresh the timestamp
+        if len(requirement) < _CACHEABLE_REQUIREMENT_LENGTH:
+            result = copy.deepcopy(_build_fallback_result_cached(requirement))
+        else:
+            result = _build_fallback_result(requirement)
+        result['generatedAt'] = _iso_now()
+        
+        logger.info("Fallback pipeline completed successfully!")
+        return result
+        
+    except Exception as e:
+        logger.exception("Fallback pipeline error: %s", e)
+        raise
+
+def _build_fallback_result(requirement: str) -> Dict[str, Any]:
+    """Build the fallback pipeline result for a requirement (without timestamp)"""
+    
+    # Stage 1: Requirements Analysis
+    logger.info("Stage 1: Analyzing business requirements...")
+    tech_spec = analyze_requirements(requirement)
+    
+    # Stage 2: System Architecture
+    logger.info("Stage 2: Designing crew architecture...")
+    crew_architecture = design_crew_architecture(tech_spec, include_dependencies=False)
+    
+    # Build response
+    complexity = tech_spec.complexity_estimate
+    agent_roles = tech_spec.agent_roles_needed
+    apis_required = tech_spec.apis_required
+    agents = crew_architecture.agents
+    tasks = crew_architecture.tasks
+    runtime = crew_architecture.estimated_runtime
+    workflow_name = crew_architecture.workflow.name
+    cost = estimate_cost(complexity, len(agents))
+    ellipsize = _ellipsize
+    agents_summary = [
+        {'name': agent.name, 'role': agent.role, 'goal': ellipsize(agent.goal, 60)}
+        for agent in agents
+    ]
+    tasks_summary = [
+        {'name': task.name, 'description': ellipsize(task.description, 50), 'agent_name': task.agent_name}
+        for task in tasks
+    ]
+    
+    return {
+        'systemName': extract_system_name(requirement),
+        'agents': len(agents),
+        'complexity': complexity,
+        'estimatedTime': runtime,
+        'estimatedCost': cost,
+        'architecture': {
+            'crew_name': crew_architecture.crew_name,
+            'crew_description': crew_architecture.crew_description,
+            'agents': agents_summary,
+            'tasks': tasks_summary,
+            'estimated_runtime': runtime,
+            'workflow_name': workflow_name
+        },
+        'deployment': {
+            'platform': "Railway",
+            'estimatedSetupTime': "15-30 minutes",
+            'monthlyRunningCost': cost
+        },
+        'generatedAt': None,
+        'complexity_score': get_complexity_score(complexity),
+        'pipeline_stages': [
+            {
+                'stage': 'Requirements Analysis',
+                'status': 'completed',
+                'output': {
+                    'complexity': complexity,
+                    'estimated_agents': tech_spec.estimated_agents,
+                    'agent_roles': agent_roles if len(agent_roles) <= 3 else agent_roles[:3],
+                    'apis_required': apis_required if len(apis_required) <= 3 else apis_required[:3]
+                }
+            },
+            {
+                'stage': 'System Architecture', 
+                'status': 'completed',
+                'output': {
+                    'crew_name': crew_architecture.crew_name,
+                    'agents_designed': len(agents),
+                    'tasks_defined': len(tasks),
+                    'workflow': workflow_name
+                }
+            },
+            # Copied so a caller editing its response cannot change later ones
+            copy.deepcopy(_FALLBACK_MODE_STAGE)
+        ]
+    }
+
+# Memoized builder; callers deep-copy the shared result before mutating it
+_build_fallback_result_cached = functools.lru_cache(maxsize=512)(_build_fallback_result)
+
+def extract_system_name(requirement: str) -> str:
+    """Extract a reasonable system name from the requirement"""
+    hits = _scan_keywords(requirement.lower(), _SYSTEM_NAME_SCANNER)
+    
+    found_domain = next((domain for domain in _SYSTEM_NAME_DOMAINS if domain in hits), None)
+    found_keyword = next((keyword for keyword in _SYSTEM_NAME_KEYWORDS if keyword in hits), None)
+    
+    if found_domain and found_keyword:
+        return f"{found_domain.title()} {found_keyword.title()}"
+    elif found_domain:
+        return f"{found_domain.title()} System"
+    elif found_keyword:
+        return f"Business {found_keyword.title()}"
+    else:
+        return "Business Automation System"
+
+def _ellipsize(text: str, limit: int, _len=len) -> str:
+    """Truncate text to limit characters, marking the cut with '...'"""
+    return text if _len(text) <= limit else text[:limit] + '...'
+
+def estimate_cost(complexity: str, agent_count: int) -> str:
+    """Estimate monthly cost"""
+    base_cost = _BASE_COSTS.get(complexity, 50)
+    agent_cost = agent_count * 10
+    total_cost = base_cost + agent_cost
+    return f"${total_cost}-{total_cost + 50}"
+
+def get_complexity_score(complexity: str) -> int:
+    """Convert complexity to numeric score"""
+    return _COMPLEXITY_SCORES.get(complexity, 2)
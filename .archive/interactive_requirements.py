@@ -4,9 +4,12 @@ Interactive Requirements Process for CrewBuilder
 Fixes the single-prompt problem with conversation-based refinement
 """
 
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional, Deque
+from collections import deque
 from dataclasses import dataclass
 from enum import Enum
+from itertools import chain, islice
+from secrets import token_hex
 
 class ConversationStage(Enum):
     INITIAL_UNDERSTANDING = "initial"
@@ -15,12 +18,71 @@ class ConversationStage(Enum):
     VALIDATION = "validation"
     READY_TO_BUILD = "ready"
 
-@dataclass
+# Business domains in priority order, with the keywords that identify each
+_DOMAIN_KEYWORDS = (
+    ('content', ('content', 'blog', 'social', 'post', 'article', 'writing')),
+    ('marketing', ('marketing', 'campaign', 'lead', 'email', 'newsletter')),
+    ('sales', ('sales', 'crm', 'deal', 'prospect', 'pipeline')),
+    ('support', ('support', 'help', 'ticket', 'customer service')),
+    ('operations', ('operation', 'workflow', 'process', 'automation')),
+    ('data', ('data', 'analytics', 'report', 'dashboard', 'metrics')),
+    ('ecommerce', ('shop', 'store', 'product', 'inventory', 'order')),
+    ('hr', ('hr', 'hiring', 'employee', 'onboard', 'payroll'))
+)
+
+# Words that mark a prompt as complex or simple
+_COMPLEX_INDICATORS = ('complex', 'enterprise', 'advanced', 'multiple systems', 'integrate')
+_SIMPLE_INDICATORS = ('simple', 'basic', 'easy', 'quick')
+
+# Clarifying questions: always asked, then by domain, then by complexity
+_BASE_QUESTIONS = (
+    "What's the main problem you're trying to solve?",
+    "Who will be using this system?",
+    "How are you handling this process manually now?"
+)
+
+_DOMAIN_QUESTIONS = {
+    'content': (
+        "What type of content do you want to create?",
+        "How often do you publish?",
+        "What platforms do you publish to?",
+        "Do you have existing content templates or style guides?"
+    ),
+    'marketing': (
+        "What marketing channels are you currently using?",
+        "What's your target audience?",
+        "Do you have existing marketing tools (CRM, email platform)?",
+        "What are your main marketing goals?"
+    ),
+    'sales': (
+        "What does your current sales process look like?",
+        "What CRM system do you use?",
+        "How do you currently track leads?",
+        "What's your average deal size and sales cycle?"
+    )
+}
+
+_COMPLEXITY_QUESTIONS = {
+    'complex': (
+        "Which systems need to be integrated?",
+        "Do you have any compliance requirements?",
+        "What's your technical team's experience level?",
+        "Do you need real-time processing or batch processing?"
+    )
+}
+
+# Oldest questions are dropped once a conversation has asked this many
+_MAX_TRACKED_QUESTIONS = 50
+
+# Areas whose answers most improve our understanding of the requirement
+_KEY_AREAS = ('main_goal', 'platforms', 'current_process', 'integrations')
+
+@dataclass(slots=True)
 class RequirementConversation:
     session_id: str
     stage: ConversationStage
     original_prompt: str
-    clarifying_questions: List[str]
+    clarifying_questions: Deque[str]  # Most recent questions, bounded for long sessions
     user_answers: Dict[str, str]
     refined_requirements: Dict[str, Any]
     confidence_score: float
@@ -31,9 +93,10 @@ class InteractiveRequirementsGatherer:
     def start_conversation(self, initial_prompt: str) -> RequirementConversation:
         """Start interactive requirements gathering"""
         
-        # Analyze initial prompt for domain and complexity
-        domain = self._detect_domain(initial_prompt)
-        complexity = self._estimate_complexity(initial_prompt)
+        # Analyze initial prompt for domain and complexity (lower-cased once for both)
+        prompt_lower = initial_prompt.lower()
+        domain = self._detect_domain(initial_prompt, prompt_lower)
+        complexity = self._estimate_complexity(initial_prompt, prompt_lower)
         
         # Generate targeted clarifying questions
         questions = self._generate_questions(initial_prompt, domain, complexity)
@@ -42,7 +105,7 @@ class InteractiveRequirementsGatherer:
             session_id=self._generate_session_id(),
             stage=ConversationStage.INITIAL_UNDERSTANDING,
             original_prompt=initial_prompt,
-            clarifying_questions=questions,
+            clarifying_questions=deque(questions, maxlen=_MAX_TRACKED_QUESTIONS),
             user_answers={},
             refined_requirements={},
             confidence_score=0.3  # Low until we get answers
@@ -87,8 +150,9 @@ class InteractiveRequirementsGatherer:
         return {
             "understanding": f"I understand you want to {reqs.get('main_goal', 'automate a process')}",
             "scope": reqs.get('scope_description', 'Automated business process'),
-            "key_features": reqs.get('features', []),
-            "integrations": reqs.get('required_integrations', []),
+            # Copied so editing the summary cannot change the conversation's requirements
+            "key_features": list(reqs.get('features', ())),
+            "integrations": list(reqs.get('required_integrations', ())),
             "complexity": reqs.get('complexity', 'moderate'),
             "estimated_agents": reqs.get('agent_count', 3),
             "estimated_time": reqs.get('estimated_time', '2-4 weeks'),
@@ -100,39 +164,30 @@ class InteractiveRequirementsGatherer:
             ]
         }
     
-    def _detect_domain(self, prompt: str) -> str:
-        """Detect the business domain from initial prompt"""
-        prompt_lower = prompt.lower()
+    def _detect_domain(self, prompt: str, prompt_lower: Optional[str] = None) -> str:
+        """Detect the business domain from initial prompt (prompt_lower: its lower-cased form, if at hand)"""
+        if prompt_lower is None:
+            prompt_lower = prompt.lower()
         
-        domains = {
-            'content': ['content', 'blog', 'social', 'post', 'article', 'writing'],
-            'marketing': ['marketing', 'campaign', 'lead', 'email', 'newsletter'],
-            'sales': ['sales', 'crm', 'deal', 'prospect', 'pipeline'],
-            'support': ['support', 'help', 'ticket', 'customer service'],
-            'operations': ['operation', 'workflow', 'process', 'automation'],
-            'data': ['data', 'analytics', 'report', 'dashboard', 'metrics'],
-            'ecommerce': ['shop', 'store', 'product', 'inventory', 'order'],
-            'hr': ['hr', 'hiring', 'employee', 'onboard', 'payroll']
-        }
+        # Keywords match anywhere in the prompt (e.g. 'post' in 'posts');
+        # map() keeps each substring test in C instead of a generator frame
+        contains = prompt_lower.__contains__
         
-        for domain, keywords in domains.items():
-            if any(keyword in prompt_lower for keyword in keywords):
+        for domain, keywords in _DOMAIN_KEYWORDS:
+            if any(map(contains, keywords)):
                 return domain
         
         return 'general'
     
-    def _estimate_complexity(self, prompt: str) -> str:
-        """Estimate complexity from initial prompt"""
-        indicators = {
-            'simple': ['simple', 'basic', 'easy', 'quick'],
-            'complex': ['complex', 'enterprise', 'advanced', 'multiple systems', 'integrate']
-        }
+    def _estimate_complexity(self, prompt: str, prompt_lower: Optional[str] = None) -> str:
+        """Estimate complexity from initial prompt (prompt_lower: its lower-cased form, if at hand)"""
+        if prompt_lower is None:
+            prompt_lower = prompt.lower()
+        contains = prompt_lower.__contains__
         
-        prompt_lower = prompt.lower()
-        
-        if any(word in prompt_lower for word in indicators['complex']) or len(prompt) > 500:
+        if any(map(contains, _COMPLEX_INDICATORS)) or len(prompt) > 500:
             return 'complex'
-        elif any(word in prompt_lower for word in indicators['simple']) or len(prompt) < 100:
+        elif any(map(contains, _SIMPLE_INDICATORS)) or len(prompt) < 100:
             return 'simple'
         else:
             return 'moderate'
@@ -140,49 +195,12 @@ class InteractiveRequirementsGatherer:
     def _generate_questions(self, prompt: str, domain: str, complexity: str) -> List[str]:
         """Generate targeted clarifying questions"""
         
-        base_questions = [
-            "What's the main problem you're trying to solve?",
-            "Who will be using this system?",
-            "How are you handling this process manually now?"
-        ]
-        
-        domain_questions = {
-            'content': [
-                "What type of content do you want to create?",
-                "How often do you publish?",
-                "What platforms do you publish to?",
-                "Do you have existing content templates or style guides?"
-            ],
-            'marketing': [
-                "What marketing channels are you currently using?",
-                "What's your target audience?",
-                "Do you have existing marketing tools (CRM, email platform)?",
-                "What are your main marketing goals?"
-            ],
-            'sales': [
-                "What does your current sales process look like?",
-                "What CRM system do you use?",
-                "How do you currently track leads?",
-                "What's your average deal size and sales cycle?"
-            ]
-        }
-        
-        complexity_questions = {
-            'complex': [
-                "Which systems need to be integrated?",
-                "Do you have any compliance requirements?",
-                "What's your technical team's experience level?",
-                "Do you need real-time processing or batch processing?"
-            ]
-        }
-        
-        questions = base_questions.copy()
-        questions.extend(domain_questions.get(domain, []))
-        
-        if complexity == 'complex':
-            questions.extend(complexity_questions['complex'])
-        
-        return questions[:6]  # Limit to avoid overwhelming
+        # Stop as soon as six questions are collected, to avoid overwhelming
+        return list(islice(chain(
+            _BASE_QUESTIONS,
+            _DOMAIN_QUESTIONS.get(domain, ()),
+            _COMPLEXITY_QUESTIONS.get(complexity, ())
+        ), 6))
     
     def _refine_requirements(self, original_prompt: str, answers: Dict[str, str]) -> Dict[str, Any]:
         """Refine requirements based on answers"""
@@ -210,13 +228,15 @@ class InteractiveRequirementsGatherer:
         if not answers:
             return 0.2
         
-        key_areas = ['main_goal', 'platforms', 'current_process', 'integrations']
-        answered_areas = sum(1 for area in key_areas if any(area in q for q in answers.keys()))
+        # Search all answer keys at once; areas never contain a newline, so none
+        # can match across two joined keys
+        questions = '\n'.join(answers)
+        answered_areas = sum(area in questions for area in _KEY_AREAS)
         
         base_confidence = min(0.9, 0.3 + (answered_areas * 0.15))
         
         # Boost confidence for detailed answers
-        detailed_answers = sum(1 for answer in answers.values() if len(answer) > 20)
+        detailed_answers = sum(len(answer) > 20 for answer in answers.values())
         detail_boost = min(0.2, detailed_answers * 0.05)
         
         return min(0.95, base_confidence + detail_boost)
@@ -226,15 +246,17 @@ class InteractiveRequirementsGatherer:
         """Generate follow-up questions for areas that need clarification"""
         
         followup = []
+        # Join and lower-case the answers once for all keyword checks
+        answers_text = ' '.join(existing_answers.values()).lower()
         
         # Check for missing critical information
         if not refined_reqs.get('required_integrations'):
             followup.append("What tools or platforms do you currently use that should be integrated?")
         
-        if refined_reqs.get('complexity') == 'complex' and 'technical team' not in ' '.join(existing_answers.values()).lower():
+        if refined_reqs.get('complexity') == 'complex' and 'technical team' not in answers_text:
             followup.append("Do you have technical team members who can help with setup and maintenance?")
         
-        if 'budget' not in ' '.join(existing_answers.values()).lower():
+        if 'budget' not in answers_text:
             followup.append("Do you have a budget range in mind for this automation?")
         
         return followup[:3]  # Limit follow-ups
@@ -266,8 +288,8 @@ class InteractiveRequirementsGatherer:
         return "$50-100"  # Simplified
     
     def _generate_session_id(self) -> str:
-        import uuid
-        return str(uuid.uuid4())
+        # Opaque random ID (128 bits); nothing parses it as a UUID
+        return token_hex(16)
 
 # Example usage
 if __name__ == "__main__":
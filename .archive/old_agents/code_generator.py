@@ -1,15 +1,42 @@
 """Code Generator Agent - Converts crew architectures into runnable CrewAI Python code"""
 
 from dataclasses import dataclass
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Tuple
+import hashlib
 import json
 import re
+import string
 
 from crewai import Agent, Task, Crew
 from .llm_config import get_configured_llm
 from .system_architect import CrewArchitecture, GeneratedCode
 
 
+# Sections requested in the generation prompt's OUTPUT FORMAT
+_SECTION_NAMES = ('MAIN_CODE', 'REQUIREMENTS', 'CONFIG', 'SETUP', 'USAGE', 'TESTS', 'COST', 'PERFORMANCE')
+# ASCII-only upper-casing keeps offsets in the folded text aligned with the original
+_ASCII_UPPER = str.maketrans(string.ascii_lowercase, string.ascii_uppercase)
+_LEADING_SPACE_RE = re.compile(r"\s*")
+# A section runs until the next line that starts with a "WORD:" label
+_SECTION_END_RE = re.compile(r"\n[A-Z_]+:", re.IGNORECASE)
+# An opening ```python fence at a line start, or a closing ``` at a line end. Leading
+# with the literal backticks lets the regex engine skip straight to candidate fences.
+_CODE_FENCE_RE = re.compile(r'```(?:(?<=^```)python\n|$)', re.MULTILINE)
+
+
+# LLMs by temperature; only configured ones are kept, so a key added later is picked up
+_llms: Dict[float, Any] = {}
+
+def _get_llm(temperature: float):
+    """LLM shared by all CodeGenerator instances, so its HTTP connection pool is reused"""
+    llm = _llms.get(temperature)
+    if llm is None:
+        llm = get_configured_llm(temperature=temperature)
+        if llm is not None:
+            _llms[temperature] = llm
+    return llm
+
+
 class CodeGenerator:
     """
     AI-powered code generation agent that converts crew architectures 
@@ -19,14 +46,37 @@ class CodeGenerator:
     with proper error handling, documentation, and configuration management.
     """
     
+    # Instructions and output schema shared by every generation request
+    _STATIC_PROMPT_PREFIX = """Generate complete, runnable CrewAI Python code for the crew architecture described at the end.
+
+REQUIREMENTS:
+1. Generate complete Python code using CrewAI framework
+2. Include proper imports and dependencies
+3. Create Agent instances with all specified properties
+4. Create Task instances with proper agent assignments
+5. Create Crew instance with proper orchestration
+6. Add comprehensive error handling and logging
+7. Include clear documentation and docstrings
+8. Add configuration management for API keys
+9. Include usage examples and setup instructions
+
+OUTPUT FORMAT:
+Return a structured response with these sections:
+MAIN_CODE: [Complete Python code]
+REQUIREMENTS: [Dependencies list for requirements.txt]
+CONFIG: [Environment configuration template]
+SETUP: [Step-by-step setup instructions]
+USAGE: [Example usage code]
+TESTS: [Basic validation tests]
+COST: [Estimated API costs and usage]
+PERFORMANCE: [Runtime and resource notes]
+"""
+    
     def __init__(self):
         """Initialize the Code Generator agent"""
         # Get configured LLM
-
-        llm = get_configured_llm(temperature=0.7)
-
+        llm = _get_llm(0.7)
         
-
         self.agent = Agent(
             role="Code Generation Specialist",
             goal="Convert crew architectures into clean, runnable CrewAI Python code",
@@ -52,14 +102,28 @@ class CodeGenerator:
         Returns:
             GeneratedCode: Complete code package ready for deployment
         """
+        crew, prompt_version = self._create_generation_crew(crew_architecture)
+        result = crew.kickoff()
+        return self._finish_generation(str(result), crew_architecture, prompt_version)
+    
+    async def generate_crew_code_async(self, crew_architecture: CrewArchitecture) -> GeneratedCode:
+        """
+        Generate code like generate_crew_code, awaiting the LLM call instead of
+        blocking, so an async caller can run other work or generations meanwhile
+        """
+        crew, prompt_version = self._create_generation_crew(crew_architecture)
+        result = await crew.kickoff_async()
+        return self._finish_generation(str(result), crew_architecture, prompt_version)
+    
+    def _create_generation_crew(self, crew_architecture: CrewArchitecture) -> Tuple[Crew, str]:
+        """Build the single-task generation crew and the version hash of its prompt"""
         print(f"🔧 Generating code for: {crew_architecture.crew_name}")
         print(f"   📊 Agents: {len(crew_architecture.agents)}")
         print(f"   📋 Tasks: {len(crew_architecture.tasks)}")
         
-        # Create code generation task
-        generation_task = Task(
-            description=f"""Generate complete, runnable CrewAI Python code for the following crew architecture:
-
+        # Create code generation task: static instructions first, crew-specific
+        # details last, so repeated generations share a cacheable prompt prefix
+        description = self._STATIC_PROMPT_PREFIX + f"""
 CREW SPECIFICATION:
 - Name: {crew_architecture.crew_name}
 - Description: {crew_architecture.crew_description}
@@ -76,50 +140,37 @@ WORKFLOW:
 - Description: {crew_architecture.workflow.description}
 - Task Sequence: {' -> '.join(crew_architecture.workflow.task_sequence)}
 
-DEPENDENCIES: {', '.join(crew_architecture.dependencies)}
-
-REQUIREMENTS:
-1. Generate complete Python code using CrewAI framework
-2. Include proper imports and dependencies
-3. Create Agent instances with all specified properties
-4. Create Task instances with proper agent assignments
-5. Create Crew instance with proper orchestration
-6. Add comprehensive error handling and logging
-7. Include clear documentation and docstrings
-8. Add configuration management for API keys
-9. Include usage examples and setup instructions
-
-OUTPUT FORMAT:
-Return a structured response with these sections:
-MAIN_CODE: [Complete Python code]
-REQUIREMENTS: [Dependencies list for requirements.txt]
-CONFIG: [Environment configuration template]
-SETUP: [Step-by-step setup instructions]
-USAGE: [Example usage code]
-TESTS: [Basic validation tests]
-COST: [Estimated API costs and usage]
-PERFORMANCE: [Runtime and resource notes]""",
+DEPENDENCIES: {', '.join(crew_architecture.dependencies)}"""
+        # Identical crews produce identical prompts, so callers can key caches on this
+        prompt_version = hashlib.blake2b(description.encode(), digest_size=8).hexdigest()
+        
+        generation_task = Task(
+            description=description,
             expected_output="Complete CrewAI code package with all required components",
             agent=self.agent
         )
         
-        # Execute the generation task
-        crew = Crew([self.agent], [generation_task], verbose=True)
-        result = crew.kickoff()
-        
+        return Crew([self.agent], [generation_task], verbose=True), prompt_version
+    
+    def _finish_generation(self, ai_response: str, crew_architecture: CrewArchitecture,
+                           prompt_version: str) -> GeneratedCode:
+        """Parse the generation result, falling back to template code"""
         # Parse the AI-generated response
         try:
-            generated_code = self._parse_code_generation(str(result))
+            generated_code = self._parse_code_generation(ai_response)
             print("✅ Code generation completed successfully!")
-            return generated_code
         except Exception as e:
             print(f"⚠️  AI parsing failed, using fallback: {e}")
-            return self._create_fallback_code(crew_architecture)
+            generated_code = self._create_fallback_code(crew_architecture)
+        
+        generated_code.prompt_version = prompt_version
+        return generated_code
     
     def _format_agents_for_prompt(self, agents) -> str:
-        """Format agent specifications for the AI prompt"""
+        """Format agent specifications for the AI prompt, ordered by name"""
         formatted = []
-        for agent in agents:
+        # Agent order carries no meaning (unlike task order), so sort it for a stable prompt
+        for agent in sorted(agents, key=lambda agent: agent.name):
             formatted.append(f"""
 Agent: {agent.name}
 - Role: {agent.role}
@@ -148,17 +199,13 @@ Task: {task.name}
     def _parse_code_generation(self, ai_response: str) -> GeneratedCode:
         """Parse the AI-generated code response into structured format"""
         
-        # Extract sections using regex patterns
-        sections = {
-            'MAIN_CODE': self._extract_section(ai_response, 'MAIN_CODE'),
-            'REQUIREMENTS': self._extract_section(ai_response, 'REQUIREMENTS'),
-            'CONFIG': self._extract_section(ai_response, 'CONFIG'),
-            'SETUP': self._extract_section(ai_response, 'SETUP'),
-            'USAGE': self._extract_section(ai_response, 'USAGE'),
-            'TESTS': self._extract_section(ai_response, 'TESTS'),
-            'COST': self._extract_section(ai_response, 'COST'),
-            'PERFORMANCE': self._extract_section(ai_response, 'PERFORMANCE')
-        }
+        # Case-fold the response once, then locate the first occurrence of each
+        # section header with a plain substring search
+        folded = ai_response.translate(_ASCII_UPPER)
+        sections = {}
+        for name in _SECTION_NAMES:
+            position = folded.find(name + ':')
+            sections[name] = self._extract_section(ai_response, position + len(name) + 1) if position >= 0 else ""
         
         return GeneratedCode(
             main_code=sections['MAIN_CODE'] or "# Code generation failed",
@@ -171,19 +218,21 @@ Task: {task.name}
             performance_notes=sections['PERFORMANCE'] or "Performance analysis pending"
         )
     
-    def _extract_section(self, text: str, section_name: str) -> str:
-        """Extract a specific section from the AI response"""
-        pattern = rf"{section_name}:\s*(.*?)(?=\n[A-Z_]+:|$)"
-        match = re.search(pattern, text, re.DOTALL | re.IGNORECASE)
-        
-        if match:
-            content = match.group(1).strip()
-            # Clean up common formatting artifacts
-            content = re.sub(r'^\[|\]$', '', content)  # Remove brackets
-            content = re.sub(r'^```python\n|```$', '', content, flags=re.MULTILINE)  # Remove code blocks
-            return content.strip()
+    def _extract_section(self, text: str, start: int) -> str:
+        """Extract the section whose header ends at the given offset of the AI response"""
+        start = _LEADING_SPACE_RE.match(text, start).end()
+        end = _SECTION_END_RE.search(text, start)
+        content = text[start:end.start() if end else len(text)].strip()
         
-        return ""
+        # Clean up common formatting artifacts
+        # Remove the [ ] placeholder brackets from the output format
+        if content.startswith('['):
+            content = content[1:]
+        if content.endswith(']'):
+            content = content[:-1]
+        if '```' in content:
+            content = _CODE_FENCE_RE.sub('', content)  # Remove code blocks
+        return content.strip()
     
     def _create_fallback_code(self, crew_architecture: CrewArchitecture) -> GeneratedCode:
         """Create basic code when AI generation fails"""
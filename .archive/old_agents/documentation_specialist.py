@@ -5,14 +5,46 @@ Generates comprehensive user documentation and setup guides for non-technical us
 
 from crewai import Agent, Task
 from .llm_config import get_configured_llm
-import json
+from collections import OrderedDict
+import functools
+import hashlib
+from itertools import chain, islice
 import re
+import threading
 from typing import Dict, List, Any, Optional
-from pydantic import BaseModel, Field
+import orjson
+from pydantic import BaseModel, ConfigDict, Field
+
+
+_AGENT_RE = re.compile(r'class (\w+Agent)')
+_TASK_RE = re.compile(r'Task\s*\([^)]*goal\s*=\s*["\']([^"\']+)')
+_TOOL_PATTERNS = (
+    re.compile(r'from crewai_tools import (\w+)'),
+    re.compile(r'tools\s*=\s*\[([^\]]+)\]'),
+    re.compile(r'@tool\s*def\s+(\w+)'),
+)
+_IMPORT_RE = re.compile(r'(?:from|import)\s+([a-zA-Z_][a-zA-Z0-9_]*)')
+# Most recently used documentation plans kept by DocumentationSpecialist
+_PLAN_CACHE_SIZE = 128
+
+
+# LLMs by temperature; only configured ones are kept, so a key added later is picked up
+_llms: Dict[float, Any] = {}
+
+def _get_llm(temperature: float):
+    """LLM shared by all DocumentationSpecialist instances, so its HTTP connection pool is reused"""
+    llm = _llms.get(temperature)
+    if llm is None:
+        llm = get_configured_llm(temperature=temperature)
+        if llm is not None:
+            _llms[temperature] = llm
+    return llm
 
 
 class UserGuide(BaseModel):
     """Represents a user guide for non-technical users"""
+    model_config = ConfigDict(frozen=True, extra='forbid')
+
     title: str = Field(description="Guide title")
     target_audience: str = Field(description="Target user type: 'beginner', 'intermediate', 'technical'")
     overview: str = Field(description="Brief system overview and purpose")
@@ -25,6 +57,8 @@ class UserGuide(BaseModel):
 
 class TechnicalDocumentation(BaseModel):
     """Represents technical documentation for developers"""
+    model_config = ConfigDict(frozen=True, extra='forbid')
+
     title: str = Field(description="Documentation title")
     system_architecture: str = Field(description="High-level system architecture description")
     api_documentation: str = Field(description="API setup and configuration instructions")
@@ -37,6 +71,8 @@ class TechnicalDocumentation(BaseModel):
 
 class DeploymentGuide(BaseModel):
     """Represents platform-specific deployment guides"""
+    model_config = ConfigDict(frozen=True, extra='forbid')
+
     platform: str = Field(description="Deployment platform: 'local', 'cloud', 'docker', 'serverless'")
     title: str = Field(description="Deployment guide title")
     overview: str = Field(description="Deployment approach overview")
@@ -50,6 +86,8 @@ class DeploymentGuide(BaseModel):
 
 class DocumentationPlan(BaseModel):
     """Complete documentation plan for a CrewAI system"""
+    model_config = ConfigDict(frozen=True, extra='forbid')
+
     system_name: str = Field(description="Name of the CrewAI system")
     complexity_level: str = Field(description="'simple', 'moderate', 'complex'")
     target_users: List[str] = Field(description="Primary user types")
@@ -63,14 +101,83 @@ class DocumentationPlan(BaseModel):
     support_resources: List[str] = Field(description="Additional support and learning resources")
 
 
+# Static sections of the technical documentation
+_ENV_SETUP_DOC = """
+Development Environment Setup:
+
+1. Python Requirements:
+   - Python 3.8+ (recommended: 3.11+)
+   - pip (Python package manager)
+   - Virtual environment (recommended)
+
+2. Installation:
+   ```bash
+   python -m venv crewai_env
+   source crewai_env/bin/activate  # Linux/Mac
+   crewai_env\\Scripts\\activate     # Windows
+   pip install -r requirements.txt
+   ```
+
+3. Configuration:
+   - Copy .env.template to .env
+   - Add API keys to .env file
+   - Verify setup with test_setup.py
+""".strip()
+
+_CONFIG_GUIDE_DOC = """
+Configuration Management:
+
+1. Environment Variables (.env):
+   - API_KEY variables for external services
+   - DEBUG=true for development mode
+   - LOG_LEVEL=INFO for logging control
+
+2. Agent Configuration:
+   - Role definitions in agent classes
+   - Goal and backstory customization
+   - Tool assignment and permissions
+
+3. Task Configuration:
+   - Task dependencies and workflows
+   - Output formats and destinations
+   - Error handling and retries
+""".strip()
+
+_TROUBLESHOOTING_DOC = """
+Technical Troubleshooting:
+
+1. Common Issues:
+   - Import errors: Check Python path and virtual environment
+   - API failures: Verify keys and rate limits
+   - Agent errors: Check agent configuration and tools
+   - Task failures: Review task dependencies and inputs
+
+2. Debugging:
+   - Enable DEBUG mode in .env
+   - Check logs/ directory for detailed errors
+   - Use test scripts for component validation
+   - Monitor API usage and quotas
+
+3. Performance:
+   - Monitor token usage for cost optimization
+   - Adjust agent concurrency for performance
+   - Cache results to reduce API calls
+""".strip()
+
+
 class DocumentationSpecialist:
     """Documentation Specialist agent for generating comprehensive user documentation."""
     
+    # Plans keyed by a content hash of the generate_documentation inputs. Shared by
+    # every instance, since the plan does not depend on the agent.
+    _plan_cache: "OrderedDict[str, DocumentationPlan]" = OrderedDict()
+    _plan_cache_lock = threading.Lock()
+    
     def __init__(self):
         """Initialize the Documentation Specialist agent."""
         # Get configured LLM
 
-        llm = get_configured_llm(temperature=0.7)
+        llm = _get_llm(0.7)
 
         
 
@@ -91,7 +198,7 @@ class DocumentationSpecialist:
         )
         
         # Documentation best practices knowledge
-        self.documentation_patterns = self._build_documentation_patterns()
+        self.documentation_patterns = _documentation_patterns()
     
     def generate_documentation(self, 
                              validated_code: str, 
@@ -106,8 +213,18 @@ class DocumentationSpecialist:
             quality_report: Quality analysis and validation results
             
         Returns:
-            Complete documentation plan with guides and instructions
+            Complete documentation plan with guides and instructions. Repeated calls
+            with identical inputs are served from a cache; each call gets its own
+            deep copy, since frozen models still hold mutable lists and dicts.
         """
+        cache_key = self._plan_cache_key(validated_code, api_integration_plan, quality_report)
+        if cache_key is not None:
+            with self._plan_cache_lock:
+                plan = self._plan_cache.get(cache_key)
+                if plan is not None:
+                    self._plan_cache.move_to_end(cache_key)
+                    return plan.model_copy(deep=True)
+        
         try:
             # Parse inputs
             code_analysis = self._analyze_code_structure(validated_code)
@@ -138,7 +255,9 @@ class DocumentationSpecialist:
             # Calculate estimated reading time
             reading_time = self._estimate_reading_time(user_guide, technical_docs, deployment_guides)
             
-            return DocumentationPlan(
+            # Every component is built by the helpers above from trusted values,
+            # so the models are assembled without re-running field validation
+            plan = DocumentationPlan.model_construct(
                 system_name=code_analysis.get("system_name", "CrewAI System"),
                 complexity_level=complexity_assessment["level"],
                 target_users=target_users,
@@ -155,6 +274,24 @@ class DocumentationSpecialist:
         except Exception as e:
             # Fallback documentation plan for error cases
             return self._generate_fallback_documentation_plan(str(e))
+        
+        if cache_key is not None:
+            with self._plan_cache_lock:
+                self._plan_cache[cache_key] = plan.model_copy(deep=True)
+                if len(self._plan_cache) > _PLAN_CACHE_SIZE:
+                    self._plan_cache.popitem(last=False)
+        return plan
+    
+    @staticmethod
+    def _plan_cache_key(validated_code: str, api_integration_plan: Dict[str, Any],
+                        quality_report: Dict[str, Any]) -> Optional[str]:
+        """Content hash of the documentation inputs, or None if they are not JSON-serializable"""
+        try:
+            payload = orjson.dumps([validated_code, api_integration_plan, quality_report],
+                                   option=orjson.OPT_SORT_KEYS)
+        except TypeError:
+            return None
+        return hashlib.blake2b(payload, digest_size=16).hexdigest()
     
     def _analyze_code_structure(self, validated_code: str) -> Dict[str, Any]:
         """Analyze the structure of validated code to understand documentation needs."""
@@ -171,53 +308,47 @@ class DocumentationSpecialist:
         # Extract system information from code
         if "class " in validated_code:
             # Find agent classes
-            agent_matches = re.findall(r'class (\w+Agent)', validated_code)
+            agent_matches = _AGENT_RE.findall(validated_code)
             analysis["agents"] = agent_matches or ["CustomAgent"]
             
-            # Find task definitions
-            task_matches = re.findall(r'Task\s*\([^)]*goal\s*=\s*["\']([^"\']+)', validated_code)
-            analysis["tasks"] = task_matches[:5] if task_matches else ["Data processing", "Analysis", "Report generation"]
-        
-        # Extract tools from imports or tool definitions
-        tool_patterns = [
-            r'from crewai_tools import (\w+)',
-            r'tools\s*=\s*\[([^\]]+)\]',
-            r'@tool\s*def\s+(\w+)'
-        ]
-        
-        for pattern in tool_patterns:
-            matches = re.findall(pattern, validated_code)
-            analysis["tools"].extend(matches)
-        
-        # Clean up tools list
-        analysis["tools"] = list(set(analysis["tools"]))[:10]  # Limit to 10 tools
+            # Find task definitions (only the first five are kept, so stop scanning there)
+            task_matches = [m.group(1) for m in islice(_TASK_RE.finditer(validated_code), 5)]
+            analysis["tasks"] = task_matches if task_matches else ["Data processing", "Analysis", "Report generation"]
+        
+        # Extract tools from imports or tool definitions: the first 10 distinct names
+        # in discovery order, with later patterns only scanned while fewer are found
+        tools = {}
+        for match in chain.from_iterable(pattern.finditer(validated_code) for pattern in _TOOL_PATTERNS):
+            tools[match.group(1)] = None
+            if len(tools) == 10:
+                break
+        analysis["tools"] = list(tools)
         
         # Extract dependencies from requirements or imports
         if "import " in validated_code:
-            import_matches = re.findall(r'(?:from|import)\s+([a-zA-Z_][a-zA-Z0-9_]*)', validated_code)
-            analysis["dependencies"] = [imp for imp in import_matches if imp not in ['os', 'sys', 'json', 're']][:10]
+            import_matches = (m.group(1) for m in _IMPORT_RE.finditer(validated_code))
+            analysis["dependencies"] = list(islice((imp for imp in import_matches if imp not in {'os', 'sys', 'json', 're'}), 10))
         
         return analysis
     
     def _analyze_api_requirements(self, api_integration_plan: Dict[str, Any]) -> Dict[str, Any]:
-        """Analyze API requirements to understand setup complexity."""
-        if not api_integration_plan:
-            return {
-                "total_apis": 1,
-                "critical_apis": 1,
-                "estimated_cost": "$50-100",
-                "setup_complexity": "moderate",
-                "environment_variables": ["OPENAI_API_KEY"],
-                "platforms": ["OpenAI"]
-            }
+        """
+        Analyze API requirements to understand setup complexity.
+        
+        A missing plan goes through the same defaults as a partial one, so the result
+        always has the same keys in the same order. List values are deduplicated in
+        their original (priority) order, so equivalent plans produce equal analyses.
+        """
+        plan = api_integration_plan or {}
+        platforms = [rec.get("provider", "OpenAI") for rec in plan.get("recommendations", [])]
         
         return {
-            "total_apis": api_integration_plan.get("total_apis", 1),
-            "critical_apis": api_integration_plan.get("critical_apis", 1),
-            "estimated_cost": api_integration_plan.get("total_estimated_cost", "$50-100"),
-            "setup_complexity": "complex" if api_integration_plan.get("complexity_score", 5) > 6 else "moderate",
-            "environment_variables": api_integration_plan.get("environment_variables", ["OPENAI_API_KEY"]),
-            "platforms": [rec.get("provider", "OpenAI") for rec in api_integration_plan.get("recommendations", [])][:5]
+            "total_apis": plan.get("total_apis", 1),
+            "critical_apis": plan.get("critical_apis", 1),
+            "estimated_cost": plan.get("total_estimated_cost", "$50-100"),
+            "setup_complexity": "complex" if plan.get("complexity_score", 5) > 6 else "moderate",
+            "environment_variables": list(dict.fromkeys(plan.get("environment_variables", ["OPENAI_API_KEY"]))),
+            "platforms": list(dict.fromkeys(platforms))[:5] or ["OpenAI"]
         }
     
     def _assess_documentation_complexity(self, quality_report: Dict[str, Any], api_analysis: Dict[str, Any]) -> Dict[str, str]:
@@ -320,7 +451,7 @@ class DocumentationSpecialist:
             "Example of system output"
         ]
         
-        return UserGuide(
+        return UserGuide.model_construct(
             title=f"User Guide: Getting Started with {system_name}",
             target_audience="beginner",
             overview=f"This guide helps you set up and use your {system_name}, which uses AI agents to automate tasks and provide intelligent assistance. No technical experience required!",
@@ -371,49 +502,6 @@ Configuration Files:
 • requirements.txt - Python dependencies
 """
         
-        # Environment setup
-        env_setup = """
-Development Environment Setup:
-
-1. Python Requirements:
-   - Python 3.8+ (recommended: 3.11+)
-   - pip (Python package manager)
-   - Virtual environment (recommended)
-
-2. Installation:
-   ```bash
-   python -m venv crewai_env
-   source crewai_env/bin/activate  # Linux/Mac
-   crewai_env\\Scripts\\activate     # Windows
-   pip install -r requirements.txt
-   ```
-
-3. Configuration:
-   - Copy .env.template to .env
-   - Add API keys to .env file
-   - Verify setup with test_setup.py
-"""
-        
-        # Configuration guide
-        config_guide = """
-Configuration Management:
-
-1. Environment Variables (.env):
-   - API_KEY variables for external services
-   - DEBUG=true for development mode
-   - LOG_LEVEL=INFO for logging control
-
-2. Agent Configuration:
-   - Role definitions in agent classes
-   - Goal and backstory customization
-   - Tool assignment and permissions
-
-3. Task Configuration:
-   - Task dependencies and workflows
-   - Output formats and destinations
-   - Error handling and retries
-"""
-        
         # Integration examples
         integrations = [
             "Custom tool integration with @tool decorator",
@@ -423,28 +511,6 @@ Configuration Management:
             "Adding error handling and logging"
         ]
         
-        # Troubleshooting
-        troubleshooting = """
-Technical Troubleshooting:
-
-1. Common Issues:
-   - Import errors: Check Python path and virtual environment
-   - API failures: Verify keys and rate limits
-   - Agent errors: Check agent configuration and tools
-   - Task failures: Review task dependencies and inputs
-
-2. Debugging:
-   - Enable DEBUG mode in .env
-   - Check logs/ directory for detailed errors
-   - Use test scripts for component validation
-   - Monitor API usage and quotas
-
-3. Performance:
-   - Monitor token usage for cost optimization
-   - Adjust agent concurrency for performance
-   - Cache results to reduce API calls
-"""
-        
         # Maintenance procedures
         maintenance = [
             "Regular monitoring of API usage and costs",
@@ -454,14 +520,14 @@ Technical Troubleshooting:
             "Monitoring log files for errors and performance issues"
         ]
         
-        return TechnicalDocumentation(
+        return TechnicalDocumentation.model_construct(
             title=f"Technical Documentation: {system_name}",
             system_architecture=architecture.strip(),
             api_documentation=api_docs.strip(),
-            environment_setup=env_setup.strip(),
-            configuration_guide=config_guide.strip(),
+            environment_setup=_ENV_SETUP_DOC,
+            configuration_guide=_CONFIG_GUIDE_DOC,
             integration_examples=integrations,
-            troubleshooting_guide=troubleshooting.strip(),
+            troubleshooting_guide=_TROUBLESHOOTING_DOC,
             maintenance_procedures=maintenance
         )
     
@@ -473,7 +539,7 @@ Technical Troubleshooting:
         estimated_cost = api_analysis.get("estimated_cost", "$50-100")
         
         # Local deployment guide
-        local_guide = DeploymentGuide(
+        local_guide = DeploymentGuide.model_construct(
             platform="local",
             title=f"Local Deployment: {system_name}",
             overview="Run the system on your personal computer for development and testing",
@@ -517,7 +583,7 @@ Technical Troubleshooting:
         
         # Cloud deployment guide (for moderate/complex systems)
         if complexity_assessment["level"] in ["moderate", "complex"]:
-            cloud_guide = DeploymentGuide(
+            cloud_guide = DeploymentGuide.model_construct(
                 platform="cloud",
                 title=f"Cloud Deployment: {system_name}",
                 overview="Deploy to cloud platforms for scalability and team access",
@@ -562,7 +628,7 @@ Technical Troubleshooting:
         
         # Docker deployment guide (for complex systems)
         if complexity_assessment["level"] == "complex":
-            docker_guide = DeploymentGuide(
+            docker_guide = DeploymentGuide.model_construct(
                 platform="docker",
                 title=f"Docker Deployment: {system_name}",
                 overview="Containerized deployment for consistent environments and easy scaling",
@@ -724,7 +790,7 @@ Technical Troubleshooting:
     def _generate_fallback_documentation_plan(self, error_message: str) -> DocumentationPlan:
         """Generate a basic documentation plan when errors occur."""
         
-        fallback_user_guide = UserGuide(
+        fallback_user_guide = UserGuide.model_construct(
             title="User Guide: CrewAI System Setup",
             target_audience="beginner",
             overview="This system uses AI agents to automate tasks and provide intelligent assistance.",
@@ -741,7 +807,7 @@ Technical Troubleshooting:
             success_criteria=["System starts without errors", "AI agents respond to prompts"]
         )
         
-        fallback_technical_docs = TechnicalDocumentation(
+        fallback_technical_docs = TechnicalDocumentation.model_construct(
             title="Technical Documentation: CrewAI System",
             system_architecture="CrewAI-based system with specialized AI agents",
             api_documentation="Requires API keys for LLM services",
@@ -752,7 +818,7 @@ Technical Troubleshooting:
             maintenance_procedures=["Monitor API usage", "Update dependencies"]
         )
         
-        fallback_deployment = DeploymentGuide(
+        fallback_deployment = DeploymentGuide.model_construct(
             platform="local",
             title="Local Deployment Guide",
             overview="Run system locally for development",
@@ -764,7 +830,7 @@ Technical Troubleshooting:
             scaling_guidelines=["Single user deployment"]
         )
         
-        return DocumentationPlan(
+        return DocumentationPlan.model_construct(
             system_name="CrewAI System",
             complexity_level="moderate",
             target_users=["Business Users", "Technical Users"],
@@ -777,31 +843,38 @@ Technical Troubleshooting:
             quick_start_checklist=["Install Python", "Setup API keys", "Run system"],
             support_resources=["README.md", "CrewAI Documentation"]
         )
-    
-    def _build_documentation_patterns(self) -> Dict[str, Any]:
-        """Build documentation best practices and patterns."""
-        return {
-            "writing_style": {
-                "tone": "friendly and encouraging",
-                "language": "clear and jargon-free",
-                "structure": "step-by-step with clear outcomes",
-                "examples": "concrete and relevant to user needs"
-            },
-            "user_experience": {
-                "accessibility": "multiple skill levels",
-                "navigation": "clear hierarchy and sections",
-                "visuals": "screenshots and diagrams where helpful",
-                "feedback": "success criteria and troubleshooting"
-            },
-            "technical_accuracy": {
-                "verification": "all instructions tested",
-                "updates": "version-specific guidance",
-                "compatibility": "cross-platform considerations",
-                "security": "best practices for API keys and data"
-            }
+
+
+@functools.cache
+def _documentation_patterns() -> Dict[str, Any]:
+    """Documentation best practices and patterns, built once and shared by every instance."""
+    return {
+        "writing_style": {
+            "tone": "friendly and encouraging",
+            "language": "clear and jargon-free",
+            "structure": "step-by-step with clear outcomes",
+            "examples": "concrete and relevant to user needs"
+        },
+        "user_experience": {
+            "accessibility": "multiple skill levels",
+            "navigation": "clear hierarchy and sections",
+            "visuals": "screenshots and diagrams where helpful",
+            "feedback": "success criteria and troubleshooting"
+        },
+        "technical_accuracy": {
+            "verification": "all instructions tested",
+            "updates": "version-specific guidance",
+            "compatibility": "cross-platform considerations",
+            "security": "best practices for API keys and data"
         }
+    }
 
 
 def create_documentation_specialist() -> DocumentationSpecialist:
     """Factory function to create a DocumentationSpecialist instance."""
     return DocumentationSpecialist()
+
+
+def to_json(plan: DocumentationPlan) -> bytes:
+    """Serialize a documentation plan with orjson, newline-terminated, ready for an HTTP body."""
+    return orjson.dumps(plan.model_dump(mode="python"), option=orjson.OPT_APPEND_NEWLINE)
@@ -71,6 +71,7 @@ class GeneratedCode:
     validation_tests: str       # Basic tests for the generated code
     estimated_cost: str         # Estimated API costs for running the crew
     performance_notes: str      # Expected runtime and resource usage
+    prompt_version: str = ""    # Hash of the generation prompt, for caller-side cache keys
 
 
 class SystemArchitect:
@@ -3,8 +3,32 @@
 Test the new CrewAI Orchestrator
 """
 
-import asyncio
-from crewbuilder_orchestrator import get_orchestrator
+import os
+from crewai import Agent, Task, Crew
+from crewbuilder_orchestrator import get_orchestrator, _EMBEDDER_CONFIG, _embedding_function
+
+def test_memory_embedder_config():
+    """Crews built with the orchestrator's embedder config must accept the cached embedder"""
+    
+    # Building the crew only configures memory storage; no API call is made.
+    # The placeholder key is removed again so later tests see the real environment.
+    saved_key = os.environ.get("OPENAI_API_KEY")
+    if saved_key is None:
+        os.environ["OPENAI_API_KEY"] = "sk-test"
+    
+    try:
+        agent = Agent(role="Tester", goal="Check crew memory setup", backstory="Test agent", llm="gpt-4o-mini")
+        task = Task(description="Say hello", expected_output="A greeting", agent=agent)
+        
+        # The same construction _kickoff_by_level and _kickoff_hierarchical use
+        crew = Crew(agents=[agent], tasks=[task], memory=True, embedder=_EMBEDDER_CONFIG)
+        
+        # CrewAI must use the instance itself, not call it as an embedder factory
+        assert crew._short_term_memory.storage.embedder_config is _embedding_function
+        print("✅ Crew accepts the cached memory embedder")
+    finally:
+        if saved_key is None:
+            os.environ.pop("OPENAI_API_KEY", None)
 
 def test_orchestrator():
     """Test the orchestrator with a sample requirement"""
@@ -77,4 +101,5 @@ def test_orchestrator():
         traceback.print_exc()
 
 if __name__ == "__main__":
+    test_memory_embedder_config()
     test_orchestrator()
\ No newline at end of file